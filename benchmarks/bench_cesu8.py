@@ -0,0 +1,155 @@
+####################
+#
+# Benchmark: CESU-8 codec throughput
+#   © Enabling Languages 2022
+#   Released under the MIT License.
+#
+#   Encodes and decodes ASCII, CJK and emoji heavy corpora with the cesu8
+#   codec and the previous per-character implementation, and transcodes them
+#   to UTF-8 bytes, reporting MB/s of CESU-8 data.
+#
+# Usage:
+#    python bench_cesu8.py [megabytes]
+#
+####################
+
+import os, sys, timeit, codecs
+libpath = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'utils')
+if libpath not in sys.path:
+    sys.path.append(libpath)
+
+import cesu8
+
+SURROGATE_IDENTICATOR_INT = 0xED
+SURROGATE_IDENTICATOR_BYTE = b'\xed'
+
+# Previous implementation, kept for comparison
+class LegacyIncrementalDecoder(codecs.BufferedIncrementalDecoder):
+    # Decoder inspired by python-ftfy written by Rob Speer
+    # https://github.com/LuminosoInsight/python-ftfy/blob/master/ftfy/bad_codecs/utf8_variants.py
+
+    def _buffer_decode(self, input, errors, final):
+        decoded_segments = []
+        position = 0
+
+        while True:
+            decoded, consumed = self._buffer_decode_step(input[position:], errors, final)
+
+            if consumed == 0:
+                break
+
+            decoded_segments.append(decoded)
+            position += consumed
+
+        if final and position != len(input):
+            raise Exception("Final decoder doesn't decoded all bytes")
+
+        return u''.join(decoded_segments), position
+
+    def _buffer_decode_step(self, input, errors, final):
+        # If begin of CESU-8 sequence
+        if input.startswith(SURROGATE_IDENTICATOR_BYTE):
+            if len(input) < 6:
+                if not final:
+                    # Stream is not done yet
+                    return u'', 0
+
+                # As there are less than six bytes it can't be a CESU-8 surrogate
+                # but probably a UTF-8 byte sequence
+                return codecs.utf_8_decode(input, errors, final)
+
+            bytenums = input
+
+            # Verify that the 6 bytes are in possible range of a CESU-8 surrogate
+            if bytenums[1] >= 0xa0 and bytenums[1] <= 0xbf and \
+               bytenums[2] >= 0x80 and bytenums[2] <= 0xbf and \
+               bytenums[3] == SURROGATE_IDENTICATOR_INT and \
+               bytenums[4] >= 0xb0 and bytenums[4] <= 0xbf and \
+               bytenums[5] >= 0x80 and bytenums[5] <= 0xbf:
+
+                codepoint = (
+                    ((bytenums[1] & 0x0f) << 16) +
+                    ((bytenums[2] & 0x3f) << 10) +
+                    ((bytenums[4] & 0x0f) << 6) +
+                    (bytenums[5] & 0x3f) +
+                    0x10000
+                )
+                return chr(codepoint), 6
+
+            # No CESU-8 surrogate but probably a 3 byte UTF-8 sequence
+            return codecs.utf_8_decode(input[:3], errors, final)
+
+        cesu8_surrogate_start = input.find(SURROGATE_IDENTICATOR_BYTE)
+        if cesu8_surrogate_start > 0:
+            # Decode everything until start of cesu8 surrogate pair
+            return codecs.utf_8_decode(input[:cesu8_surrogate_start], errors, final)
+
+        # No sign of CESU-8 encoding
+        return codecs.utf_8_decode(input, errors, final)
+
+class LegacyIncrementalEncoder(codecs.BufferedIncrementalEncoder):
+
+    def _buffer_encode(self, input, errors, final=False):
+        encoded_segments = []
+        position = 0
+        input_length = len(input)
+
+        while position + 1 <= input_length:
+            encoded, consumed = self._buffer_encode_step(
+                input[position], errors, final
+            )
+
+            if consumed == 0:
+                break
+
+            encoded_segments.append(encoded)
+            position += consumed
+
+        if final and position != len(input):
+            raise Exception("Final encoder doesn't encode all characters")
+
+        return b''.join(encoded_segments), position
+
+    def _buffer_encode_step(self, char, errors, final):
+        codepoint = ord(char)
+        if codepoint <= 65535:
+            return codecs.utf_8_encode(char, errors)
+        else:
+            seq = bytearray(6)
+            seq[0] = 0xED
+            seq[1] = 0xA0 | (((codepoint & 0x1F0000) >> 16) - 1)
+            seq[2] = 0x80 | (codepoint & 0xFC00) >> 10
+            seq[3] = 0xED
+            seq[4] = 0xB0 | ((codepoint >> 6) & 0x3F)
+            seq[5] = 0x80 | (codepoint & 0x3F)
+            return bytes(seq), 1
+
+CORPORA = {
+    "ASCII": "The history of the English language, 2nd edition. ",
+    "CJK": "中華人民共和國的歷史與文化，東京大学出版会。",
+    "emoji": "Fête 🎉👩‍👩‍👧 𞤀𞤣𞤤𞤢𞤥 𞤆𞤵𞤤𞤢𞤪 😀😃 ",
+}
+
+def main():
+    mb = float(sys.argv[1]) if len(sys.argv) > 1 else 1
+    for label, sample in CORPORA.items():
+        text = sample * int(mb * 1024 * 1024 / len(cesu8.encode(sample)[0]))
+        data = cesu8.encode(text)[0]
+        size_mb = len(data) / (1024 * 1024)
+        assert data == LegacyIncrementalEncoder().encode(text, final=True)
+        assert cesu8.decode(data)[0] == LegacyIncrementalDecoder().decode(data, final=True) == text
+        assert codecs.decode(data, "cesu-8") == text
+        candidates = [
+            ("legacy encode", lambda: LegacyIncrementalEncoder().encode(text, final=True)),
+            ("cesu8 encode", lambda: cesu8.encode(text)),
+            ("legacy decode", lambda: LegacyIncrementalDecoder().decode(data, final=True)),
+            ("cesu8 decode", lambda: cesu8.decode(data)),
+            ("transcode to utf-8", lambda: cesu8.Transcoder("cesu-8", "utf-8").transcode(data, final=True)),
+        ]
+        print(f"{label}: {size_mb:.2f} MB CESU-8")
+        for name, func in candidates:
+            t = timeit.timeit(func, number=1)
+            print(f"  {name:16} {t:8.3f}s  {size_mb / t:8.2f} MB/s")
+
+if __name__ == "__main__":
+    main()
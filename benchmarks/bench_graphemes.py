@@ -0,0 +1,63 @@
+####################
+#
+# Benchmark: grapheme cluster segmentation
+#   © Enabling Languages 2022
+#   Released under the MIT License.
+#
+#   Compares regex \X, the grapheme package and the ICU character
+#   BreakIterator, directly and through each GraphemeEngine backend.
+#   el_utils.grapheme_engine("fastest") picks the quickest backend at run time.
+#
+# Usage:
+#    python bench_graphemes.py [number_of_records]
+#
+####################
+
+import os, sys, timeit
+libpath = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'utils')
+if libpath not in sys.path:
+    sys.path.append(libpath)
+
+import regex
+import grapheme
+import el_utils as elu
+
+SAMPLES = [
+    "Nguyễn Văn Ước, Lịch sử Việt Nam",
+    "ရန်ကုန်ကွန်ပျူတာတက္ကသိုလ်",
+    "اللغة العربية رائعة",
+    "עִבְרִית חֲדָשָׁה",
+    "𞤀𞤣𞤤𞤢𞤥 𞤆𞤵𞤤𞤢𞤪 👩‍👩‍👧",
+    "The history of the English language",
+]
+
+def icu_graphemes(text):
+    with elu.borrowed_break_iterator("", "character") as bi:
+        return [text[start:end] for start, end, status in elu.iterate_break_offsets(text, bi)]
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    records = [SAMPLES[i % len(SAMPLES)] for i in range(n)]
+    engines = {backend: elu.GraphemeEngine(backend) for backend in elu.GRAPHEME_BACKENDS}
+    expected = [regex.findall(r'\X', r) for r in SAMPLES]
+    for backend, engine in engines.items():
+        differences = sum(1 for r, e in zip(SAMPLES, expected) if engine.graphemes(r) != e)
+        print(f"{backend}: {differences} of {len(SAMPLES)} samples differ from regex \\X")
+    candidates = [
+        ("regex.findall(r'\\X')", lambda: [regex.findall(r'\X', r) for r in records]),
+        ("grapheme.graphemes", lambda: [list(grapheme.graphemes(r)) for r in records]),
+        ("ICU iterate_break_offsets", lambda: [icu_graphemes(r) for r in records]),
+    ]
+    for backend, engine in engines.items():
+        candidates.append((f"GraphemeEngine({backend}).graphemes", lambda engine=engine: [engine.graphemes(r) for r in records]))
+    for backend, engine in engines.items():
+        candidates.append((f"GraphemeEngine({backend}).length", lambda engine=engine: [engine.length(r) for r in records]))
+    for backend, engine in engines.items():
+        candidates.append((f"GraphemeEngine({backend}).reverse", lambda engine=engine: [engine.reverse(r) for r in records]))
+    print(f"Records: {n}, default backend: {elu.grapheme_engine().backend}, fastest: {elu.fastest_grapheme_backend()}")
+    for label, func in candidates:
+        t = timeit.timeit(func, number=1)
+        print(f"{label:36} {t:8.3f}s  {n / t:12.0f} records/s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+####################
+#
+# Benchmark: el_utils import time
+#   © Enabling Languages 2022
+#   Released under the MIT License.
+#
+#   Measures the wall time of importing el_utils in a fresh interpreter, and
+#   checks that optional engines are not loaded at import time. Exits with
+#   status 1 if a heavy module is imported eagerly or if the median import
+#   time exceeds --max-ms.
+#
+# Usage:
+#    python bench_import.py [--runs 10] [--max-ms 150]
+#
+####################
+
+import os, sys, subprocess, statistics, argparse, json
+
+libpath = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'utils')
+
+LAZY_MODULES = ['icu', 'laonlp', 'pythainlp', 'tabulate', 'grapheme', 'concurrent.futures']
+
+IMPORT_SCRIPT = '''
+import sys, time, json
+sys.path.insert(0, {libpath!r})
+start = time.perf_counter()
+import el_utils
+elapsed = time.perf_counter() - start
+print(json.dumps({{"ms": elapsed * 1000, "loaded": [m for m in {lazy!r} if m in sys.modules]}}))
+'''
+
+def run_once():
+    script = IMPORT_SCRIPT.format(libpath=libpath, lazy=LAZY_MODULES)
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description="el_utils import time benchmark")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--max-ms", type=float, default=None)
+    args = parser.parse_args()
+    results = [run_once() for _ in range(args.runs)]
+    times = [r["ms"] for r in results]
+    loaded = sorted(set(m for r in results for m in r["loaded"]))
+    median = statistics.median(times)
+    print(f"import el_utils: median {median:.1f} ms, min {min(times):.1f} ms, max {max(times):.1f} ms ({args.runs} runs)")
+    status = 0
+    if loaded:
+        print(f"Eagerly imported: {', '.join(loaded)}")
+        status = 1
+    if args.max_ms is not None and median > args.max_ms:
+        print(f"Median import time exceeds {args.max_ms} ms")
+        status = 1
+    sys.exit(status)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+####################
+#
+# Benchmark: NFKC_Casefold
+#   © Enabling Languages 2022
+#   Released under the MIT License.
+#
+#   Per-MB throughput of the previous snippets/matching.py and el_utils
+#   implementations against the ICU nfkc_cf normaliser and the precompiled
+#   fallback.
+#
+# Usage:
+#    python bench_nfkc_casefold.py [megabytes]
+#
+####################
+
+import os, sys, timeit
+root = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+for libpath in [os.path.join(root, 'utils'), os.path.join(root, 'snippets')]:
+    if libpath not in sys.path:
+        sys.path.append(libpath)
+
+import unicodedataplus as ud
+import regex as re
+import el_utils as elu
+import matching
+
+# Previous snippets/matching.py implementation
+def legacy_matching_NFKC_Casefold(s):
+    pattern = re.compile(r"\p{Default_Ignorable_Code_Point=Yes}")
+    s = re.sub(pattern, '', s)
+    return ud.normalize("NFC", ud.normalize('NFKC', s).casefold())
+
+# Previous el_utils implementation (no Default_Ignorable removal)
+def legacy_el_utils_NFKC_Casefold(s):
+    return ud.normalize("NFC", ud.normalize('NFKC', s).casefold())
+
+SAMPLES = [
+    "Trá́ce, ﬁnd an oﬃce: ٣",
+    "STRASSE Straße ǅemal",
+    "Ｆｕｌｌｗｉｄｔｈ ＡＢＣ",
+    "soft­hyphen zero​width",
+    "Διεθνοποίηση ΚΑΙ ΤΟΠΙΚΟΠΟΙΗΣΗ",
+    "The quick brown fox jumps over the lazy dog",
+]
+
+def main():
+    mb = float(sys.argv[1]) if len(sys.argv) > 1 else 2
+    records = []
+    size = 0
+    while size < mb * 1024 * 1024:
+        record = SAMPLES[len(records) % len(SAMPLES)]
+        records.append(record)
+        size += len(record.encode('utf-8'))
+    size_mb = size / (1024 * 1024)
+    candidates = [
+        ("legacy matching.NFKC_Casefold", lambda: [legacy_matching_NFKC_Casefold(r) for r in records]),
+        ("legacy el_utils.NFKC_Casefold", lambda: [legacy_el_utils_NFKC_Casefold(r) for r in records]),
+        ("NFKC_Casefold (icu)", lambda: list(elu.NFKC_Casefold_batch(records))),
+        ("NFKC_Casefold (ud)", lambda: list(elu.NFKC_Casefold_batch(records, engine="ud"))),
+        ("matching.NFKC_Casefold_batch", lambda: list(matching.NFKC_Casefold_batch(records))),
+    ]
+    print(f"Records: {len(records)}, {size_mb:.2f} MB UTF-8")
+    for label, func in candidates:
+        t = timeit.timeit(func, number=1)
+        print(f"{label:32} {t:8.3f}s  {size_mb / t:8.2f} MB/s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+####################
+#
+# Benchmark: MARC21 normalisation (NFM)
+#   © Enabling Languages 2022
+#   Released under the MIT License.
+#
+#   Compares the table driven MarcNormaliser against the previous
+#   implementation of el_utils.normalise("NFM", ...).
+#
+# Usage:
+#    python bench_nfm.py [number_of_records]
+#
+####################
+
+import os, sys, timeit
+libpath = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'utils')
+if libpath not in sys.path:
+    sys.path.append(libpath)
+
+import unicodedataplus as ud
+import regex as re
+import el_utils as elu
+
+# Previous implementation, kept for comparison
+def legacy_normalise_nfm(text):
+    # Normalise to NFD
+    text = ud.normalize("NFD", text)
+    # Latin variations between NFD and MNF
+    latn_rep = {
+        "\u004F\u031B": "\u01A0",
+        "\u006F\u031B": "\u01A1",
+        "\u0055\u031B": "\u01AF",
+        "\u0075\u031B": "\u01B0"
+    }
+    # Cyrillic variations between NFD and MNF
+    cyrl_rep = {
+        "\u0418\u0306": "\u0419",
+        "\u0438\u0306": "\u0439",
+        "\u0413\u0301": "\u0403",
+        "\u0433\u0301": "\u0453",
+        "\u0415\u0308": "\u0401",
+        "\u0435\u0308": "\u0451",
+        "\u0406\u0308": "\u0407",
+        "\u0456\u0308": "\u0457",
+        "\u041A\u0301": "\u040C",
+        "\u043A\u0301": "\u045C",
+        "\u0423\u0306": "\u040E",
+        "\u0443\u0306": "\u045E"
+    }
+    # Arabic variations between NFD and MNF
+    arab_rep = {
+        "\u0627\u0653": "\u0622",
+        "\u0627\u0654": "\u0623",
+        "\u0648\u0654": "\u0624",
+        "\u0627\u0655": "\u0625",
+        "\u064A\u0654": "\u0626"
+    }
+    # Only process strings containing characters that need replacing
+    if bool(re.search(r'[ouOU]\u031B', text)):
+        text = elu.replace_all(text, latn_rep)
+    if bool(re.search(r'[\u0413\u041A\u0433\u043A]\u0301|[\u0418\u0423\u0438\u0443]\u0306|[\u0406\u0415\u0435\u0456]\u0308', text)):
+        text = elu.replace_all(text, cyrl_rep)
+    if bool(re.search(r'[\u0627\u0648\u064A]\u0654|\u0627\u0655|\u0627\u0653', text)):
+        text = elu.replace_all(text, arab_rep)
+    return text
+
+SAMPLES = [
+    "Nguyễn Văn Ước, Lịch sử Việt Nam",
+    "Йошкар-Ола: Марийское книжное издательство, 1985",
+    "Ёлка и ёжик в Київському університеті",
+    "أحمد بن علي، مؤسسة الرسالة، إسطنبول",
+    "Le Petit Prince / Antoine de Saint-Exupéry",
+    "The history of the English language",
+]
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    records = [SAMPLES[i % len(SAMPLES)] for i in range(n)]
+    nfm = elu.MarcNormaliser()
+    assert [legacy_normalise_nfm(r) for r in SAMPLES] == list(nfm.normalise_many(SAMPLES))
+    legacy = timeit.timeit(lambda: [legacy_normalise_nfm(r) for r in records], number=1)
+    single = timeit.timeit(lambda: [elu.normalise("NFM", r) for r in records], number=1)
+    batch = timeit.timeit(lambda: list(nfm.normalise_many(records)), number=1)
+    print(f"Records: {n}")
+    print(f"legacy normalise('NFM')       {legacy:8.3f}s  {n / legacy:12.0f} records/s")
+    print(f"normalise('NFM')              {single:8.3f}s  {n / single:12.0f} records/s")
+    print(f"MarcNormaliser.normalise_many {batch:8.3f}s  {n / batch:12.0f} records/s")
+
+if __name__ == "__main__":
+    main()
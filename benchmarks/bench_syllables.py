@@ -0,0 +1,56 @@
+####################
+#
+# Benchmark: Myanmar syllable segmentation
+#   © Enabling Languages 2022
+#   Released under the MIT License.
+#
+#   Compares the snippets/regex_segmentation.py approach, the precompiled
+#   SyllableSegmenter and the MyanmarSyllable.rbbi break iterator.
+#
+# Usage:
+#    python bench_syllables.py [number_of_records]
+#
+####################
+
+import os, sys, timeit
+libpath = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'utils')
+if libpath not in sys.path:
+    sys.path.append(libpath)
+
+import regex
+import el_utils as elu
+
+# Core of snippets/regex_segmentation.regex_segmentation(), returning a list
+def legacy_regex_segmentation(text, pattern):
+    result = regex.sub(pattern, r"\u200B\1", text)
+    if result[0] == "\u200B":
+        result = result[1:]
+    return result.split("\u200B")
+
+SAMPLES = [
+    "ရန်ကုန်ကွန်ပျူတာတက္ကသိုလ်",
+    "မြန်မာနိုင်ငံ၏ ယဉ်ကျေးမှုနှင့် သမိုင်း",
+    "ပုဂံခေတ် မြန်မာ့ဗိသုကာလက်ရာများ ၁၉၈၅",
+    "မန္တလေးတိုင်းဒေသကြီး",
+]
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    records = [SAMPLES[i % len(SAMPLES)] for i in range(n)]
+    pattern = elu.SYLLABLE_PATTERNS["my"]
+    segmenter = elu.syllable_segmenter("my")
+    bi = elu.rbbi_break_iterator("MyanmarSyllable")
+    assert [legacy_regex_segmentation(r, pattern) for r in SAMPLES] == list(segmenter.segment_many(SAMPLES))
+    candidates = [
+        ("regex_segmentation snippet", lambda: [legacy_regex_segmentation(r, pattern) for r in records]),
+        ("SyllableSegmenter.segment_many", lambda: list(segmenter.segment_many(records))),
+        ("SyllableSegmenter.spans", lambda: [list(segmenter.spans(r)) for r in records]),
+        ("MyanmarSyllable.rbbi", lambda: [list(elu.iterate_breaks(r, bi)) for r in records]),
+    ]
+    print(f"Records: {n}")
+    for label, func in candidates:
+        t = timeit.timeit(func, number=1)
+        print(f"{label:32} {t:8.3f}s  {n / t:12.0f} records/s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+####################
+#
+# Benchmark: UCA collators
+#   © Enabling Languages 2022
+#   Released under the MIT License.
+#
+#   Compares pyuca.Collator with el_uca.Collator for load time, memory
+#   allocated while loading, and sort keys per second, and checks that both
+#   produce identical sort keys.
+#
+# Usage:
+#    python bench_uca.py [allkeys_file] [number_of_strings]
+#
+####################
+
+import os, sys, time, timeit, random, tracemalloc
+root = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+libpath = os.path.join(root, 'utils')
+if libpath not in sys.path:
+    sys.path.append(libpath)
+
+import pyuca
+import el_uca
+
+WORDS = ["₨", "Z", "ز", "z", "ر", "٨", "R", "﷼", "Ɔbaa", "ɛkyɛ", "Ước", "ŀl", "ཱྀ", "中文", "Straße", "ǅemal"]
+
+def load(factory):
+    tracemalloc.start()
+    start = time.perf_counter()
+    collator = factory()
+    elapsed = time.perf_counter() - start
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return collator, elapsed, size
+
+def main():
+    allkeys = sys.argv[1] if len(sys.argv) > 1 else os.path.join(root, 'rules', 'collation', 'allkeys_CLDR.txt')
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else 50000
+    random.seed(0)
+    strings = ["".join(random.sample(WORDS, 3)) for i in range(n)]
+    el_uca.compiled_allkeys(allkeys)
+    candidates = [
+        ("pyuca.Collator", lambda: pyuca.Collator(allkeys)),
+        ("el_uca.Collator", lambda: el_uca.Collator(allkeys)),
+    ]
+    collators = []
+    print(f"{os.path.basename(allkeys)}, {n} strings")
+    for label, factory in candidates:
+        collator, elapsed, size = load(factory)
+        t = timeit.timeit(lambda: [collator.sort_key(s) for s in strings], number=1)
+        print(f"{label:16} load {elapsed * 1000:8.1f} ms  {size / 1024 / 1024:8.2f} MB  {n / t:10.0f} keys/s")
+        collators.append(collator)
+    mismatches = sum(1 for s in strings if collators[0].sort_key(s) != collators[1].sort_key(s))
+    print(f"Sort key mismatches: {mismatches}")
+
+if __name__ == "__main__":
+    main()
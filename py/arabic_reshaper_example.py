@@ -1,7 +1,11 @@
 import arabic_reshaper
 from bidi.algorithm import get_display
 
-from el_internationalisation import cp, clean_presentation_forms
+import os, sys
+libpath = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'utils')
+if libpath not in sys.path:
+    sys.path.append(libpath)
+from el_utils import cp, clean_presentation_forms, reverse_string
 
 def rtl_hack(text: str, arabic: bool = True) -> str:
     """Visually reorders Arabic or Hebrew script Unicode text
@@ -73,16 +77,10 @@ print(cp(s3_h))
 # but for languages that use combining marks,
 # it is better to reverse grapheme clusters:
 #
-#   from grapheme import graphemes
-#   print(s3_h == "".join(list(graphemes(s3))[::-1]))
-
-from grapheme import graphemes
-def reverse_string(text: str, use_graphemes: bool = False) -> str:
-    return "".join(list(graphemes(text))[::-1]) if use_graphemes else text[::-1]
-
-import regex as re
-def reverse_string_regex(text: str, use_graphemes: bool = False) -> str:
-    return "".join(re.findall(r'\X', text)[::-1]) if use_graphemes else text[::-1]
+#   print(s3_h == reverse_string(s3))
+#
+# el_utils.reverse_string() reverses grapheme clusters by default,
+# use_graphemes=False reverses codepoints.
 
 print("---")
 # print(s3_h == "".join(list(graphemes(s3))[::-1]))
@@ -92,8 +90,5 @@ print(clean_presentation_forms(text_h) == text[::-1])
 # print(clean_presentation_forms(text_h) == "".join(list(graphemes(text))[::-1]))
 
 
-print(clean_presentation_forms(text_h) == reverse_string(text))
-print(clean_presentation_forms(text_h) == reverse_string(text, use_graphemes=True))
-
-print(clean_presentation_forms(text_h) == reverse_string_regex(text))
-print(clean_presentation_forms(text_h) == reverse_string_regex(text, use_graphemes=True))
\ No newline at end of file
+print(clean_presentation_forms(text_h) == reverse_string(text, use_graphemes=False))
+print(clean_presentation_forms(text_h) == reverse_string(text))
\ No newline at end of file
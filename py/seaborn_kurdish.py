@@ -19,7 +19,7 @@
 #      * module://mplcairo.macosx  (used below for macOS)
 
 import pandas as pd
-import locale, platform
+import platform
 import gi
 import mplcairo
 import matplotlib as mpl
@@ -53,15 +53,12 @@ digitsconv = lambda x: convert_digits(x.replace("-", "٠"), sep = seps)
 
 # Covert Western Arabic digits to Eastern Arabic digits for tick labels
 def convert_to_sorani_ns(n, p=None, scale=None):
-    locale.setlocale(locale.LC_ALL, "en_US.UTF-8")
     decimal_places = 2
     n = n * scale if scale else n
-    format_string = '%0.' + str(decimal_places) + 'f' if type(n) == float else '%d'
-    n = locale.format_string(format_string, n, grouping=True, monetary=True)
+    n = format(n, f",.{decimal_places}f") if type(n) == float else format(int(n), ",d")
     n = n.replace(",", "ṯ").replace(".", "ḏ")
     sep = ["\u066C", "\u066B"]
     t = n.maketrans("0123456789", "٠١٢٣٤٥٦٧٨٩")
-    locale.setlocale(locale.LC_ALL, "")
     return n.translate(t).replace("ṯ", sep[0] ).replace("ḏ", sep[1])
 
 # import data
@@ -6,6 +6,9 @@
 #
 ####################
 
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
 from icu import BreakIterator, Locale
 
 l = "en_AU"
@@ -24,6 +27,74 @@ def iterate_breaks(text, break_iterator):
         yield text[lastpos:next_boundary]
         lastpos = next_boundary
         
+#
+# Cached break iterators
+#   Break iterators are stateful and not thread safe, so each thread keeps a
+#   bounded LRU cache of idle instances, keyed by locale and break type. An
+#   instance is checked out while in use, so nested users never share one.
+#   get_break_iterator() hands out an instance for the caller to keep,
+#   borrow_break_iterator() returns it to the cache at the end of a with block.
+#
+
+BREAK_TYPES = {
+    "character": BreakIterator.createCharacterInstance,
+    "line": BreakIterator.createLineInstance,
+    "sentence": BreakIterator.createSentenceInstance,
+    "title": BreakIterator.createTitleInstance,
+    "word": BreakIterator.createWordInstance
+}
+CACHE_SIZE = 16
+_local = threading.local()
+_stats_lock = threading.Lock()
+stats = {"hits": 0, "misses": 0}
+
+def _count(name):
+    with _stats_lock:
+        stats[name] += 1
+
+# Idle instances for the current thread: OrderedDict of key -> list
+def _cache():
+    cache = getattr(_local, "cache", None)
+    if cache is None:
+        cache = _local.cache = OrderedDict()
+        _local.size = 0
+    return cache
+
+def get_break_iterator(kind="character", loc=DEFAULT_LOC):
+    cache = _cache()
+    key = (loc.getName(), kind)
+    idle = cache.get(key)
+    if idle:
+        bi = idle.pop()
+        if not idle:
+            del cache[key]
+        _local.size -= 1
+        _count("hits")
+        return bi
+    _count("misses")
+    return BREAK_TYPES[kind](loc)
+
+def release_break_iterator(bi, kind="character", loc=DEFAULT_LOC):
+    cache = _cache()
+    key = (loc.getName(), kind)
+    cache.setdefault(key, []).append(bi)
+    cache.move_to_end(key)
+    _local.size += 1
+    while _local.size > CACHE_SIZE:
+        oldest, idle = next(iter(cache.items()))
+        idle.pop(0)
+        if not idle:
+            del cache[oldest]
+        _local.size -= 1
+
+@contextmanager
+def borrow_break_iterator(kind="character", loc=DEFAULT_LOC):
+    bi = get_break_iterator(kind, loc)
+    try:
+        yield bi
+    finally:
+        release_break_iterator(bi, kind, loc)
+
 text=""
 
 # character, word, line, title, and sentence instances
@@ -32,5 +103,5 @@ text=""
 #   createSentenceInstance()
 #   createTitleInstance()
 #   createWordInstance()
-bi = BreakIterator.createCharacterInstance(DEFAULT_LOC)
-list(iterate_breaks(text, bi))
+with borrow_break_iterator("character", DEFAULT_LOC) as bi:
+    list(iterate_breaks(text, bi))
@@ -7,7 +7,6 @@
 ####################
 
 import unicodedataplus as ud, regex as re
-import locale
 
 #
 # To Western Arabic digits
@@ -44,14 +43,11 @@ def is_number(v, sep = (",", ".")):
 #    Returns a string
 #    Modifications added to assist in changing matplotlib tick labels: p and scale parameters. These two parameters should be idnored in all other cases.
 
-# import locale
 def convert_numeral_systems(n, p=None, system_out="", system_in="latn", decimal=2, sep_in=["", "."], sep_out=["", "."], scale=None):
-    locale.setlocale(locale.LC_ALL, "en_US.UTF-8")
     decimal_places = decimal
     if system_in == "latn" and sep_in == ["", "."]:
         n = n / scale if scale else n
-        format_string = '%0.' + str(decimal_places) + 'f' if type(n) == float else '%d'
-        n = locale.format_string(format_string, n, grouping=True, monetary=True)
+        n = format(n, f",.{decimal_places}f") if type(n) == float else format(int(n), ",d")
         n = n.replace(",", "ṯ").replace(".", "ḏ")
         #n = str(n)
     if sep_in[0] in [" ", ",", "٬", "\u2009", "\u202F"]:
@@ -128,7 +124,6 @@ def convert_numeral_systems(n, p=None, system_out="", system_in="latn", decimal=
     except KeyError:
         sep = sep_out
     t = n.maketrans(data[system_in]["digits"], data[system_out]["digits"])
-    locale.setlocale(locale.LC_ALL, "")
     return n.translate(t).replace("ṯ", sep[0] ).replace("ḏ", sep[1])
 
 
@@ -142,12 +137,10 @@ def convert_numeral_systems(n, p=None, system_out="", system_in="latn", decimal=
 #
 
 def convert_to_arab_ns(n, p=None, decimal=2, sep_in=["", "."], sep_out=["\u066C", "\u066B"], scale=None):
-    locale.setlocale(locale.LC_ALL, "en_US.UTF-8")
     decimal_places = decimal
     if sep_in == ["", "."]:
         n = n * scale if scale else n
-        format_string = '%0.' + str(decimal_places) + 'f' if type(n) == float else '%d'
-        n = locale.format_string(format_string, n, grouping=True, monetary=True)
+        n = format(n, f",.{decimal_places}f") if type(n) == float else format(int(n), ",d")
         n = n.replace(",", "ṯ").replace(".", "ḏ")
     if sep_in[0] in [" ", ",", "٬", "\u2009", "\u202F"]:
         n = n.replace(r'[\u0020,٬\u2009\u202F]', "ṯ")
@@ -157,7 +150,6 @@ def convert_to_arab_ns(n, p=None, decimal=2, sep_in=["", "."], sep_out=["\u066C"
         n = n.replace(r'[,.٫]', "ḏ")
     #sep = sep_out
     t = n.maketrans("0123456789", "٠١٢٣٤٥٦٧٨٩")
-    locale.setlocale(locale.LC_ALL, "")
     return n.translate(t).replace("ṯ", sep_out[0] ).replace("ḏ", sep_out[1])
 
 convert_to_kurdish_ns = convert_to_arab_ns
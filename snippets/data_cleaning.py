@@ -17,30 +17,65 @@ from icu import UnicodeString, Locale, Normalizer2, UNormalizationMode2
 #   Simple wrappers for Unicode normalisation
 #
 
+# ICU normalisers are created once and shared, keyed by form and mode
+NORMALIZER_FORMS = {
+    "NFD": ("nfc", UNormalizationMode2.DECOMPOSE),
+    "NFKD": ("nfkc", UNormalizationMode2.DECOMPOSE),
+    "NFC": ("nfc", UNormalizationMode2.COMPOSE),
+    "NFKC": ("nfkc", UNormalizationMode2.COMPOSE)
+}
+_normalizers = {}
+
+def get_normalizer(nf):
+    form, mode = NORMALIZER_FORMS[nf.upper()]
+    normalizer = _normalizers.get((form, mode))
+    if normalizer is None:
+        normalizer = _normalizers[(form, mode)] = Normalizer2.getInstance(None, form, mode)
+    return normalizer
+
 def NFD(s, engine="ud"):
     if engine == "icu":
-        normalizer = Normalizer2.getInstance(None, "nfc", UNormalizationMode2.DECOMPOSE)
-        return normalizer.normalize(s)
+        return get_normalizer("NFD").normalize(s)
     return ud.normalize('NFD', s)
 
 def NFKD(s, engine="ud"):
     if engine == "icu":
-        normalizer = Normalizer2.getInstance(None, "nfkc", UNormalizationMode2.DECOMPOSE)
-        return normalizer.normalize(s)
+        return get_normalizer("NFKD").normalize(s)
     return ud.normalize('NFKD', s)
 
 def NFC(s, engine="ud"):
     if engine == "icu":
-        normalizer = Normalizer2.getInstance(None, "nfc", UNormalizationMode2.COMPOSE)
-        return normalizer.normalize(s)
+        return get_normalizer("NFC").normalize(s)
     return ud.normalize('NFC', s)
 
 def NFKC(s, engine="ud"):
     if engine == "icu":
-        normalizer = Normalizer2.getInstance(None, "nfkc", UNormalizationMode2.COMPOSE)
-        return normalizer.normalize(s)
+        return get_normalizer("NFKC").normalize(s)
     return ud.normalize('NFKC', s)
 
+#
+# Incremental normalisation
+#    Only the part of the string after the longest normalised prefix is
+#    normalised and appended to that prefix. Strings that are already normalised
+#    are returned as is.
+#
+#    Usage:
+#       normalize_span("Trá́ce", "NFC")
+#       df["title"] = df["title"].map(lambda s: normalize_span(s, "NFD"))
+#
+
+def normalize_span(s, nf="NFC"):
+    # ASCII text is unchanged by all normalisation forms
+    if s.isascii():
+        return s
+    normalizer = get_normalizer(nf)
+    # spanQuickCheckYes() returns a UTF-16 offset
+    u = UnicodeString(s)
+    end = normalizer.spanQuickCheckYes(u)
+    if end == len(u):
+        return s
+    return str(normalizer.normalizeSecondAndAppend(u[:end], u[end:]))
+
 #
 # Clean presentation forms
 #
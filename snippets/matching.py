@@ -10,6 +10,12 @@
 import unicodedataplus as ud
 import regex as re
 
+try:
+    from icu import Normalizer2
+    NFKC_CF_NORMALIZER = Normalizer2.getNFKCCasefoldInstance()
+except ImportError:
+    NFKC_CF_NORMALIZER = None
+
 def caseless_match(x, y):
   return x.casefold() == y.casefold()
 
@@ -19,10 +25,18 @@ def canonical_caseless_match(x, y):
 def compatibility_caseless_match(x, y):
   return ud.normalize("NFKD", ud.normalize("NFKD", ud.normalize("NFD", x).casefold()).casefold()) == ud.normalize("NFKD", ud.normalize("NFKD", ud.normalize("NFD", y).casefold()).casefold())
 
-def NFKC_Casefold(s):
-  pattern = re.compile(r"\p{Default_Ignorable_Code_Point=Yes}")
-  s = re.sub(pattern, '', s)
-  return ud.normalize("NFC", ud.normalize('NFKC', s).casefold())
+DEFAULT_IGNORABLE = re.compile(r"\p{Default_Ignorable_Code_Point=Yes}")
+
+# toNFKC_Casefold, using ICU's nfkc_cf normaliser where available.
+# The fallback removes Default_Ignorable_Code_Point characters, then applies
+# NFKC, casefolding and NFC.
+def NFKC_Casefold(s, engine="icu"):
+  if engine == "icu" and NFKC_CF_NORMALIZER is not None:
+    return NFKC_CF_NORMALIZER.normalize(s)
+  return ud.normalize("NFC", ud.normalize('NFKC', DEFAULT_IGNORABLE.sub('', s)).casefold())
+
+def NFKC_Casefold_batch(texts, engine="icu"):
+  return map(lambda s: NFKC_Casefold(s, engine), texts)
 
 def identifier_caseless_match(x, y):
   return NFKC_Casefold(ud.normalize("NFD", x)) == NFKC_Casefold(ud.normalize("NFD", y))
@@ -9,19 +9,40 @@
 #   will lowercase the strings before sorting.
 #
 #   nf (normalisation form): {NFC, NFKC, NFD, NFKD}
-#   loc (use locale): {True, False}
+#   loc (use locale): {True, False} or a locale identifier, e.g. "sv_SE" or "de-DE-u-co-phonebk"
+#
+#   Locale keys come from a LocaleSortKey: an ICU collator pinned to one locale, rather than
+#   locale.strxfrm() on the process-wide locale, so results do not change when another thread
+#   calls locale.setlocale(). loc=True pins the LC_COLLATE locale in effect on first use.
+#   Keys are memoised per unique string, and each thread gets its own collator, so a single
+#   LocaleSortKey can be shared across a thread pool.
 #
 #   Usage:
 #     * sorted(my_list, key=normalised_sort)  OR  my_list.sort(key=normalised_sort)
 #     * sorted(my_list, key=lambda x: normalised_sort(x, "NFD"))  OR  my_list.sort(key=lambda x: normalised_sort(x, "NFD"))
 #     * sorted(my_list, key=lambda x: normalised_sort(x, "NFC", loc=True))  OR  my_list.sort(key=lambda x: normalised_sort(x, "NFC", loc=True))
+#     * sorted(my_list, key=lambda x: normalised_sort(x, "NFC", loc="sv_SE"))
+#     * sorted(my_list, key=LocaleSortKey("sv_SE"))
 #
 #  For examples see gist: https://gist.github.com/andjc/821d85f0e10549f9e4ab8c84c1ee00f5
 #
+#   Pandas:
+#     Sort keys are computed once per unique value (pd.factorize) and converted
+#     to integer ranks, so sorting millions of rows only calls the key function
+#     for each distinct string.
+#     * df.sort_values("name", key=rank_key(collator.getSortKey))
+#     * df.sort_values(["surname", "name"], key=rank_key(normalised_string))
+#     * df_sort(df, ["surname", "name"], [collator.getSortKey, normalised_string], ascending=[True, False])
+#
 # ####################
 
-import locale
+import locale, functools, threading
 import unicodedata as ud
+try:
+    import numpy as np
+    import pandas as pd
+except ImportError:
+    pd = None
 
 # def normalised_sort(s, nf="NFD", loc=False):
 #     nf = nf.upper()
@@ -29,13 +50,61 @@ import unicodedata as ud
 #         s = locale.strxfrm(ud.normalize(nf, s.lower())) if loc else ud.normalize(nf, s.lower())
 #     return s
 
+# Locale pinned sort key: ICU collator per thread, keys memoised per unique string.
+#   loc = locale identifier (POSIX or BCP-47), "" for the current LC_COLLATE locale.
+#         The C and POSIX locales sort by code point, as strxfrm() does, without a collator.
+#   maxsize = number of memoised keys kept before the memo is cleared, None for unbounded
+class LocaleSortKey:
+    def __init__(self, loc="", maxsize=100000):
+        from icu import Locale
+        if not loc:
+            loc = locale.setlocale(locale.LC_COLLATE)
+        loc = loc.split(".")[0].split("@")[0]
+        if loc in ("C", "POSIX"):
+            self.locale = None
+        else:
+            self.locale = Locale.forLanguageTag(loc) if "-" in loc else Locale(loc)
+        self.maxsize = maxsize
+        self._keys = {}
+        self._local = threading.local()
+
+    def __repr__(self):
+        return "<LocaleSortKey %s>" % (self.locale.getName() if self.locale else "C")
+
+    def collator(self):
+        collator = getattr(self._local, "collator", None)
+        if collator is None:
+            from icu import Collator
+            collator = self._local.collator = Collator.createInstance(self.locale)
+        return collator
+
+    def __call__(self, s):
+        if self.locale is None:
+            return s
+        key = self._keys.get(s)
+        if key is None:
+            if self.maxsize is not None and len(self._keys) >= self.maxsize:
+                self._keys.clear()
+            key = self._keys[s] = self.collator().getSortKey(s)
+        return key
+
+    def clear(self):
+        self._keys.clear()
+
+# Shared LocaleSortKey for a locale
+@functools.lru_cache(maxsize=None)
+def locale_sort_key(loc=""):
+    return LocaleSortKey(loc)
+
 def normalised_sort(s, nf="NFKD", loc=False):
     nf = nf.upper()
     if nf in ["NFC", "NFKC", "NFD", "NFKD"]:
-        if isinstance(s, pd.core.series.Series):
+        key = locale_sort_key("" if loc is True else loc) if loc else None
+        if pd is not None and isinstance(s, pd.Series):
             s = s.str.normalize(nf).str.lower()
+            s = s.map(key) if key else s
         else:
-            s = locale.strxfrm(ud.normalize(nf, s).lower()) if loc else ud.normalize(nf, s).lower()
+            s = key(ud.normalize(nf, s).lower()) if key else ud.normalize(nf, s).lower()
     return s
 
 def normalised_string(s, nf="NFKD"):
@@ -44,14 +113,38 @@ def normalised_string(s, nf="NFKD"):
         s = ud.normalize(nf, s).lower()
     return s
 
-# Function to assist in locale specific or ICU sorting
-def df_sort(dataframe, series, key):
-    def sort_series(key=None,reverse=False):
-        def sorter(series):
-            series_list = list(series)
-            return [series_list.index(i) for i in sorted(series_list,key=key,reverse=reverse)]
-        return sorter
-    if (isinstance(series, pd.Series)):
-        sort_by_custom_dict = sort_series(key=key)
-        return dataframe.iloc[sort_by_custom_dict(series)]
+# Integer ranks of values in collation order, computing key once per unique
+# value. Values with equal keys share a rank, missing values rank last.
+def sort_ranks(values, key, ascending=True):
+    codes, uniques = pd.factorize(values)
+    keys = [key(u) for u in uniques]
+    order = sorted(range(len(uniques)), key=keys.__getitem__)
+    ranks = np.empty(len(uniques) + 1, dtype=np.int64)
+    rank = 0
+    for i, u in enumerate(order):
+        if i and keys[u] != keys[order[i - 1]]:
+            rank = i
+        ranks[u] = rank
+    if not ascending:
+        ranks = len(uniques) - 1 - ranks
+    ranks[-1] = len(uniques)
+    return ranks[codes]
+
+# Key function for DataFrame.sort_values(key=...) and Series.sort_values(key=...)
+def rank_key(key):
+    def ranker(series):
+        return pd.Series(sort_ranks(series, key), index=series.index)
+    return ranker
 
+# Function to assist in locale specific or ICU sorting
+#   series = Series (positionally aligned with dataframe), column name or list of column names
+#   key = key function, or list of key functions, one per column
+def df_sort(dataframe, series, key, ascending=True):
+    if isinstance(series, pd.Series):
+        columns = [series]
+    else:
+        columns = [dataframe[c] for c in ([series] if isinstance(series, str) else series)]
+    keys = key if isinstance(key, (list, tuple)) else [key] * len(columns)
+    ascending = ascending if isinstance(ascending, (list, tuple)) else [ascending] * len(columns)
+    ranks = [sort_ranks(c, k, a) for c, k, a in zip(columns, keys, ascending)]
+    return dataframe.iloc[np.lexsort(ranks[::-1])]
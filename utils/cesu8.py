@@ -18,11 +18,27 @@
 #
 # Changes made by Enabling Languages (09/2021):
 #     * Removed Python2 support.
+#
+# Changes made by Enabling Languages (2022):
+#     * Encoder encodes runs of BMP characters with a single utf_8_encode call,
+#       only supplementary characters are encoded individually.
+#     * Decoder walks the input by offset through a memoryview, decoding runs of
+#       bytes between surrogate lead bytes with a single utf_8_decode call.
+#     * Codec is found under the normalised name (cesu_8) used by Python 3.9+.
+#     * Added Transcoder and transcode_file, converting between CESU-8 and UTF-8
+#       bytes without decoding to str, with a command line interface:
+#          python cesu8.py [--from cesu-8] [--to utf-8] [--mmap] source destination
 
 import codecs
+import functools
+import mmap
+import os
+import re
+import sys
 
 SURROGATE_IDENTICATOR_INT = 0xED
 SURROGATE_IDENTICATOR_BYTE = b'\xed'
+SUPPLEMENTARY_CHARACTERS = re.compile('[\U00010000-\U0010FFFF]+')
 
 class IncrementalDecoder(codecs.BufferedIncrementalDecoder):
     # Decoder inspired by python-ftfy written by Rob Speer
@@ -31,98 +47,101 @@ class IncrementalDecoder(codecs.BufferedIncrementalDecoder):
     def _buffer_decode(self, input, errors, final):
         decoded_segments = []
         position = 0
-
-        while True:
-            decoded, consumed = self._buffer_decode_step(input[position:], errors, final)
-
+        input_length = len(input)
+        view = memoryview(input)
+
+        while position < input_length:
+            cesu8_surrogate_start = input.find(SURROGATE_IDENTICATOR_BYTE, position)
+            if cesu8_surrogate_start == -1:
+                cesu8_surrogate_start = input_length
+
+            if cesu8_surrogate_start > position:
+                # Decode everything until start of cesu8 surrogate pair
+                decoded, consumed = codecs.utf_8_decode(view[position:cesu8_surrogate_start], errors, final)
+                if consumed == 0:
+                    break
+                decoded_segments.append(decoded)
+                position += consumed
+                if position < cesu8_surrogate_start:
+                    # Incomplete UTF-8 sequence, wait for more input
+                    break
+                continue
+
+            decoded, consumed = self._buffer_decode_surrogate(input, view, position, errors, final)
             if consumed == 0:
                 break
-
             decoded_segments.append(decoded)
             position += consumed
 
-        if final and position != len(input):
+        if final and position != input_length:
             raise Exception("Final decoder doesn't decoded all bytes")
 
         return u''.join(decoded_segments), position
 
-    def _buffer_decode_step(self, input, errors, final):
-        # If begin of CESU-8 sequence
-        if input.startswith(SURROGATE_IDENTICATOR_BYTE):
-            if len(input) < 6:
-                if not final:
-                    # Stream is not done yet
-                    return u'', 0
-
-                # As there are less than six bytes it can't be a CESU-8 surrogate
-                # but probably a UTF-8 byte sequence
-                return codecs.utf_8_decode(input, errors, final)
-
-            bytenums = input
-
-            # Verify that the 6 bytes are in possible range of a CESU-8 surrogate
-            if bytenums[1] >= 0xa0 and bytenums[1] <= 0xbf and \
-               bytenums[2] >= 0x80 and bytenums[2] <= 0xbf and \
-               bytenums[3] == SURROGATE_IDENTICATOR_INT and \
-               bytenums[4] >= 0xb0 and bytenums[4] <= 0xbf and \
-               bytenums[5] >= 0x80 and bytenums[5] <= 0xbf:
-
-                codepoint = (
-                    ((bytenums[1] & 0x0f) << 16) +
-                    ((bytenums[2] & 0x3f) << 10) +
-                    ((bytenums[4] & 0x0f) << 6) +
-                    (bytenums[5] & 0x3f) +
-                    0x10000
-                )
-                return chr(codepoint), 6
-
-            # No CESU-8 surrogate but probably a 3 byte UTF-8 sequence
-            return codecs.utf_8_decode(input[:3], errors, final)
-
-        cesu8_surrogate_start = input.find(SURROGATE_IDENTICATOR_BYTE)
-        if cesu8_surrogate_start > 0:
-            # Decode everything until start of cesu8 surrogate pair
-            return codecs.utf_8_decode(input[:cesu8_surrogate_start], errors, final)
-
-        # No sign of CESU-8 encoding
-        return codecs.utf_8_decode(input, errors, final)
+    # Decode the sequence starting with a surrogate lead byte at position
+    def _buffer_decode_surrogate(self, input, view, position, errors, final):
+        if len(input) - position < 6:
+            if not final:
+                # Stream is not done yet
+                return u'', 0
+
+            # As there are less than six bytes it can't be a CESU-8 surrogate
+            # but probably a UTF-8 byte sequence
+            return codecs.utf_8_decode(view[position:], errors, final)
+
+        bytenums = input[position:position + 6]
+
+        # Verify that the 6 bytes are in possible range of a CESU-8 surrogate
+        if bytenums[1] >= 0xa0 and bytenums[1] <= 0xbf and \
+           bytenums[2] >= 0x80 and bytenums[2] <= 0xbf and \
+           bytenums[3] == SURROGATE_IDENTICATOR_INT and \
+           bytenums[4] >= 0xb0 and bytenums[4] <= 0xbf and \
+           bytenums[5] >= 0x80 and bytenums[5] <= 0xbf:
+
+            codepoint = (
+                ((bytenums[1] & 0x0f) << 16) +
+                ((bytenums[2] & 0x3f) << 10) +
+                ((bytenums[4] & 0x0f) << 6) +
+                (bytenums[5] & 0x3f) +
+                0x10000
+            )
+            return chr(codepoint), 6
+
+        # No CESU-8 surrogate but probably a 3 byte UTF-8 sequence
+        return codecs.utf_8_decode(view[position:position + 3], errors, final)
 
 class IncrementalEncoder(codecs.BufferedIncrementalEncoder):
 
     def _buffer_encode(self, input, errors, final=False):
         encoded_segments = []
         position = 0
-        input_length = len(input)
-
-        while position + 1 <= input_length:
-            encoded, consumed = self._buffer_encode_step(
-                input[position], errors, final
-            )
-
-            if consumed == 0:
-                break
 
-            encoded_segments.append(encoded)
-            position += consumed
+        for match in SUPPLEMENTARY_CHARACTERS.finditer(input):
+            start = match.start()
+            if start > position:
+                encoded_segments.append(codecs.utf_8_encode(input[position:start], errors)[0])
+            encoded_segments.extend(map(encode_supplementary, match.group()))
+            position = match.end()
 
-        if final and position != len(input):
-            raise Exception("Final encoder doesn't encode all characters")
+        if position < len(input):
+            encoded_segments.append(codecs.utf_8_encode(input[position:], errors)[0])
+            position = len(input)
 
         return b''.join(encoded_segments), position
 
-    def _buffer_encode_step(self, char, errors, final):
-        codepoint = ord(char)
-        if codepoint <= 65535:
-            return codecs.utf_8_encode(char, errors)
-        else:
-            seq = bytearray(6)
-            seq[0] = 0xED
-            seq[1] = 0xA0 | (((codepoint & 0x1F0000) >> 16) - 1)
-            seq[2] = 0x80 | (codepoint & 0xFC00) >> 10
-            seq[3] = 0xED
-            seq[4] = 0xB0 | ((codepoint >> 6) & 0x3F)
-            seq[5] = 0x80 | (codepoint & 0x3F)
-            return bytes(seq), 1
+# Six byte CESU-8 sequence for a supplementary character, cached as the same
+# characters (emoji, historic scripts) tend to recur in a text.
+@functools.lru_cache(maxsize=4096)
+def encode_supplementary(char):
+    codepoint = ord(char)
+    seq = bytearray(6)
+    seq[0] = 0xED
+    seq[1] = 0xA0 | (((codepoint & 0x1F0000) >> 16) - 1)
+    seq[2] = 0x80 | (codepoint & 0xFC00) >> 10
+    seq[3] = 0xED
+    seq[4] = 0xB0 | ((codepoint >> 6) & 0x3F)
+    seq[5] = 0x80 | (codepoint & 0x3F)
+    return bytes(seq)
 
 def encode(input, errors='strict'):
     return IncrementalEncoder(errors).encode(input, final=True), len(input)
@@ -147,9 +166,155 @@ CESU8_CODEC_INFO = codecs.CodecInfo(
 )
 
 def search_function(encoding):
-    if encoding == 'cesu-8':
+    if encoding in ('cesu-8', 'cesu_8'):
         return CESU8_CODEC_INFO
     else:
         return None
 
 codecs.register(search_function)
+
+#################################################################################
+#
+# Transcoding between CESU-8 and UTF-8
+#    CESU-8 and UTF-8 only differ in the encoding of supplementary characters:
+#    a six byte surrogate pair in CESU-8 and a four byte sequence in UTF-8. The
+#    transcoder rewrites those sequences in each chunk of bytes with a single
+#    regular expression pass and copies everything else unchanged. The end of a
+#    chunk that may hold an incomplete sequence is carried over to the next one.
+#
+#    With validate=True, the UTF-8 side (output when converting from CESU-8,
+#    input when converting to CESU-8) is checked and invalid sequences, including
+#    unpaired surrogates, are counted in stats["invalid"].
+#
+# Usage:
+#    transcoder = Transcoder("cesu-8", "utf-8")
+#    data = transcoder.transcode(chunk) + transcoder.transcode(b"", final=True)
+#    stats = transcode_file("export.cesu8", "export.txt", use_mmap=True)
+
+TRANSCODE_CHUNK_SIZE = 1 << 20
+CESU8_SURROGATE_PAIR = re.compile(b'\xed[\xa0-\xaf][\x80-\xbf]\xed[\xb0-\xbf][\x80-\xbf]')
+UTF8_SUPPLEMENTARY = re.compile(b'[\xf0-\xf4][\x80-\xbf]{3}')
+ENCODED_SURROGATE = re.compile(b'\xed[\xa0-\xbf][\x80-\xbf]')
+
+@functools.lru_cache(maxsize=4096)
+def surrogate_pair_to_utf8(seq):
+    return chr(
+        ((seq[1] & 0x0f) << 16) +
+        ((seq[2] & 0x3f) << 10) +
+        ((seq[4] & 0x0f) << 6) +
+        (seq[5] & 0x3f) +
+        0x10000
+    ).encode('utf-8')
+
+@functools.lru_cache(maxsize=4096)
+def utf8_to_surrogate_pair(seq):
+    return encode_supplementary(seq.decode('utf-8'))
+
+def _normalise_encoding(encoding):
+    encoding = encoding.lower().replace("_", "-")
+    return "utf-8" if encoding == "utf8" else encoding
+
+class Transcoder:
+    def __init__(self, from_encoding="cesu-8", to_encoding="utf-8", validate=True):
+        direction = (_normalise_encoding(from_encoding), _normalise_encoding(to_encoding))
+        if direction == ("cesu-8", "utf-8"):
+            self._pattern, self._replace = CESU8_SURROGATE_PAIR, surrogate_pair_to_utf8
+        elif direction == ("utf-8", "cesu-8"):
+            self._pattern, self._replace = UTF8_SUPPLEMENTARY, utf8_to_surrogate_pair
+        else:
+            raise ValueError("Transcoding is supported from cesu-8 to utf-8 and from utf-8 to cesu-8")
+        self.from_encoding, self.to_encoding = direction
+        self.validate = validate
+        self.carry = b''
+        self.stats = {"chunks": 0, "bytes_in": 0, "bytes_out": 0, "supplementary": 0, "invalid": 0}
+
+    def __repr__(self):
+        return "<Transcoder %s to %s>" % (self.from_encoding, self.to_encoding)
+
+    # Transcode a chunk of bytes. Bytes that may belong to a sequence continuing
+    # in the next chunk are held back until the next call, or until final=True.
+    def transcode(self, data, final=False):
+        if data:
+            self.stats["chunks"] += 1
+        self.stats["bytes_in"] += len(data)
+        if self.carry:
+            data = self.carry + data
+        end = len(data) if final else self._safe_end(data)
+        self.carry = bytes(data[end:])
+        output, count = self._pattern.subn(lambda m: self._replace(m.group()), data[:end])
+        self.stats["supplementary"] += count
+        if self.validate:
+            self.stats["invalid"] += count_invalid_utf8(output if self.to_encoding == "utf-8" else data[:end])
+        self.stats["bytes_out"] += len(output)
+        return output
+
+    # Start of the last (up to) six bytes, moved to a character boundary and to
+    # the start of a surrogate pair if it falls between its two halves.
+    def _safe_end(self, data):
+        end = max(len(data) - 6, 0)
+        while end < len(data) and 0x80 <= data[end] <= 0xbf:
+            end += 1
+        if end >= 3 and data[end:end + 1] == SURROGATE_IDENTICATOR_BYTE and \
+           data[end - 3] == SURROGATE_IDENTICATOR_INT and 0xa0 <= data[end - 2] <= 0xaf:
+            end -= 3
+        return end
+
+# Number of invalid sequences in UTF-8 data. The decoder reports each byte of
+# an encoded surrogate separately, so a surrogate is skipped as one sequence.
+def count_invalid_utf8(data):
+    invalid = 0
+    view = memoryview(data)
+    while True:
+        try:
+            codecs.utf_8_decode(view, 'strict', True)
+            return invalid
+        except UnicodeDecodeError as e:
+            invalid += 1
+            surrogate = ENCODED_SURROGATE.match(view, e.start)
+            view = view[surrogate.end() if surrogate else e.end:]
+
+# Transcode a file between CESU-8 and UTF-8 in chunks of chunk_size bytes.
+#    source, destination = paths or binary file objects
+#    use_mmap = True reads the source through a memory map
+# Returns the transcoder statistics.
+def transcode_file(source, destination, from_encoding="cesu-8", to_encoding="utf-8",
+                   chunk_size=TRANSCODE_CHUNK_SIZE, use_mmap=False, validate=True):
+    transcoder = Transcoder(from_encoding, to_encoding, validate)
+    src = open(source, 'rb') if isinstance(source, (str, bytes)) or hasattr(source, '__fspath__') else source
+    dst = open(destination, 'wb') if isinstance(destination, (str, bytes)) or hasattr(destination, '__fspath__') else destination
+    try:
+        if use_mmap and os.fstat(src.fileno()).st_size:
+            with mmap.mmap(src.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                for position in range(0, len(mm), chunk_size):
+                    dst.write(transcoder.transcode(mm[position:position + chunk_size]))
+        else:
+            for chunk in iter(lambda: src.read(chunk_size), b''):
+                dst.write(transcoder.transcode(chunk))
+        dst.write(transcoder.transcode(b'', final=True))
+    finally:
+        if src is not source:
+            src.close()
+        if dst is not destination:
+            dst.close()
+    return transcoder.stats
+
+def main(argv=None):
+    import argparse
+    import json
+    parser = argparse.ArgumentParser(description="Transcode files between CESU-8 and UTF-8")
+    parser.add_argument("source")
+    parser.add_argument("destination")
+    parser.add_argument("-f", "--from", dest="from_encoding", default="cesu-8")
+    parser.add_argument("-t", "--to", dest="to_encoding", default="utf-8")
+    parser.add_argument("--chunk-size", type=int, default=TRANSCODE_CHUNK_SIZE)
+    parser.add_argument("--mmap", action="store_true", help="read the source through a memory map")
+    parser.add_argument("--no-validate", dest="validate", action="store_false")
+    parser.add_argument("--strict", action="store_true", help="exit with status 1 if invalid sequences are found")
+    args = parser.parse_args(argv)
+    stats = transcode_file(args.source, args.destination, args.from_encoding, args.to_encoding,
+                           args.chunk_size, args.mmap, args.validate)
+    print(json.dumps(stats))
+    return 1 if args.strict and stats["invalid"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,279 @@
+####################
+#
+# EL UCA
+#    Unicode Collation Algorithm sort keys from allkeys_CLDR.txt or
+#    allkeys_DUCET.txt, in pure Python.
+#
+#    Copyright © 2022 Enabling Languages.
+#    This file is made available under the MIT licence.
+#
+#    The allkeys text file is compiled once into a binary table, which is
+#    memory mapped on load:
+#       * collation elements packed into an array('I'), one 32 bit word per
+#         element (primary << 16 | secondary << 5 | tertiary)
+#       * a two level page table mapping single codepoints to an entry, the
+#         offset of its collation elements and their number
+#       * contractions, as a flat array('I') of length, codepoints, entry
+#    Compiled tables are cached in ~/.cache/el_utils/uca, keyed by a hash of the
+#    allkeys file. Set the EL_UTILS_CACHE environment variable to change the
+#    cache location.
+#
+#    Sort keys are identical to those of pyuca.Collator (UCA 9.0.0 implicit
+#    weights), including the use of the standard library unicodedata module.
+#
+# Usage:
+#    import el_uca
+#    collator = el_uca.Collator("../rules/collation/allkeys_CLDR.txt")
+#    sorted(words, key=collator.sort_key)
+#    el_uca.compile_allkeys("allkeys_DUCET.txt", "allkeys_DUCET.bin")
+#
+####################
+
+import os, sys, re, mmap, hashlib
+import unicodedata
+from array import array
+
+UCA_MAGIC = b"ELUCA001"
+UCA_PAGE_SIZE = 256
+UCA_PAGE_COUNT = 0x110000 // UCA_PAGE_SIZE
+UCA_HEADER_SIZE = 5
+UCA_CACHE_DIR = os.path.join(os.environ.get("EL_UTILS_CACHE", os.path.expanduser("~/.cache/el_utils")), "uca")
+DEFAULT_ALLKEYS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "rules", "collation", "allkeys_CLDR.txt")
+
+COLL_ELEMENT_PATTERN = re.compile(r"""
+    \[
+    (?:\*|\.)
+    ([0-9A-Fa-f]{4})
+    \.
+    ([0-9A-Fa-f]{4})
+    \.
+    ([0-9A-Fa-f]{4})
+    (?:\.[0-9A-Fa-f]{4,5})?
+\]
+""", re.X)
+
+# Collation element packing: 16 bit primary, 11 bit secondary, 5 bit tertiary
+def pack_collation_element(primary, secondary, tertiary):
+    if secondary > 0x7FF or tertiary > 0x1F:
+        raise ValueError(f"Collation element weights out of range: {primary:04X}.{secondary:04X}.{tertiary:04X}")
+    return primary << 16 | secondary << 5 | tertiary
+
+def unpack_collation_element(ce):
+    return ce >> 16, (ce >> 5) & 0x7FF, ce & 0x1F
+
+# Yield ("entry", codepoints, collation elements) and ("implicit", start, end, base)
+def parse_allkeys(filename):
+    with open(filename, encoding="utf-8") as keys_file:
+        for line in keys_file:
+            line = line.split("#", 1)[0].rstrip()
+            if not line or line.startswith("@version"):
+                continue
+            if line.startswith("@implicitweights"):
+                ch_range, base = line[len("@implicitweights"):].split(";")
+                range_start, range_end = ch_range.split("..")
+                yield "implicit", int(range_start, 16), int(range_end, 16), int(base, 16)
+                continue
+            a, b = line.split(";", 1)
+            codepoints = [int(x, 16) for x in a.split()]
+            elements = [tuple(int(w, 16) for w in m.groups()) for m in COLL_ELEMENT_PATTERN.finditer(b.strip())]
+            yield "entry", codepoints, elements
+
+# Compile an allkeys text file to a binary table
+def compile_allkeys(source, destination):
+    page_index = array('I', [0]) * UCA_PAGE_COUNT
+    pages = array('I')
+    elements = array('I')
+    contractions = array('I')
+    implicit_weights = array('I')
+    for record in parse_allkeys(source):
+        if record[0] == "implicit":
+            implicit_weights.extend(record[1:])
+            continue
+        codepoints, ces = record[1], record[2]
+        entry = len(elements) | len(ces) << 24
+        elements.extend(pack_collation_element(*ce) for ce in ces)
+        if len(codepoints) == 1:
+            page, i = divmod(codepoints[0], UCA_PAGE_SIZE)
+            if not page_index[page]:
+                pages.extend([0] * UCA_PAGE_SIZE)
+                page_index[page] = len(pages) // UCA_PAGE_SIZE
+            pages[(page_index[page] - 1) * UCA_PAGE_SIZE + i] = entry
+        else:
+            contractions.append(len(codepoints))
+            contractions.extend(codepoints)
+            contractions.append(entry)
+    header = array('I', [len(page_index), len(pages), len(elements), len(contractions), len(implicit_weights)])
+    tmp = "%s.%d.tmp" % (destination, os.getpid())
+    with open(tmp, "wb") as f:
+        f.write(UCA_MAGIC)
+        for a in (header, page_index, pages, elements, contractions, implicit_weights):
+            a.tofile(f)
+    os.replace(tmp, destination)
+    return destination
+
+# Path of the compiled table for an allkeys file, compiling it if needed
+def compiled_allkeys(filename, cache_dir=UCA_CACHE_DIR):
+    with open(filename, "rb") as f:
+        digest = hashlib.sha256(f.read()).hexdigest()[:16]
+    name = "%s-%s-%s.bin" % (os.path.splitext(os.path.basename(filename))[0], digest, sys.byteorder)
+    path = os.path.join(cache_dir, name)
+    if not os.path.exists(path):
+        os.makedirs(cache_dir, exist_ok=True)
+        compile_allkeys(filename, path)
+    return path
+
+class Collator:
+    # CJK ideograph ranges given implicit weights, as in pyuca.Collator_9_0_0
+    CJK_IDEOGRAPHS_8_0_0 = True
+    CJK_IDEOGRAPHS_10_0_0 = False
+    CJK_IDEOGRAPHS_EXT_A = True
+    CJK_IDEOGRAPHS_EXT_B = True
+    CJK_IDEOGRAPHS_EXT_C = True
+    CJK_IDEOGRAPHS_EXT_D = True
+    CJK_IDEOGRAPHS_EXT_E = True
+    CJK_IDEOGRAPHS_EXT_F = False
+
+    def __init__(self, filename=DEFAULT_ALLKEYS, compiled=None, cache_dir=UCA_CACHE_DIR):
+        self.filename = filename
+        self.compiled = compiled or compiled_allkeys(filename, cache_dir)
+        self.load(self.compiled)
+
+    def __repr__(self):
+        return "<Collator %s>" % os.path.basename(self.filename)
+
+    def load(self, compiled):
+        with open(compiled, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(UCA_MAGIC)] != UCA_MAGIC:
+            raise ValueError(f"Not a compiled allkeys table: {compiled}")
+        words = memoryview(self._mmap)[len(UCA_MAGIC):].cast('I')
+        tables = []
+        position = UCA_HEADER_SIZE
+        for size in words[:UCA_HEADER_SIZE]:
+            tables.append(words[position:position + size])
+            position += size
+        self._page_index, self._pages, self._elements, contractions, implicit_weights = tables
+        self.implicit_weights = [list(implicit_weights[i:i + 3]) for i in range(0, len(implicit_weights), 3)]
+        self._contractions = {}
+        i = 0
+        while i < len(contractions):
+            n = contractions[i]
+            self._contractions[tuple(contractions[i + 1:i + 1 + n])] = contractions[i + 1 + n]
+            i += n + 2
+        self._max_contraction = max(map(len, self._contractions), default=1)
+        self._contraction_starts = {key[0] for key in self._contractions}
+        self._unpacked = {}
+
+    def _single(self, codepoint):
+        page, i = divmod(codepoint, UCA_PAGE_SIZE)
+        slot = self._page_index[page]
+        return self._pages[(slot - 1) * UCA_PAGE_SIZE + i] if slot else 0
+
+    def _entry(self, codepoints):
+        if len(codepoints) == 1:
+            return self._single(codepoints[0])
+        return self._contractions.get(tuple(codepoints), 0)
+
+    # Longest prefix of key in the table: (prefix, entry, rest)
+    def find_prefix(self, key):
+        if key[0] in self._contraction_starts:
+            for n in range(min(len(key), self._max_contraction), 1, -1):
+                entry = self._contractions.get(tuple(key[:n]))
+                if entry:
+                    return key[:n], entry, key[n:]
+        entry = self._single(key[0])
+        if entry:
+            return key[:1], entry, key[1:]
+        return [], 0, key
+
+    # Unpacked collation elements of an entry, cached as entries recur
+    def _elements_of(self, entry):
+        elements = self._unpacked.get(entry)
+        if elements is None:
+            offset = entry & 0xFFFFFF
+            elements = self._unpacked[entry] = [unpack_collation_element(ce) for ce in self._elements[offset:offset + (entry >> 24)]]
+        return elements
+
+    def collation_elements(self, normalized_string):
+        collation_elements = []
+
+        lookup_key = self.build_lookup_key(normalized_string)
+        while lookup_key:
+            S, entry, lookup_key = self.find_prefix(lookup_key)
+
+            # handle non-starters
+            last_class = None
+            for i, C in enumerate(lookup_key):
+                combining_class = unicodedata.combining(chr(C))
+                if combining_class == 0 or combining_class == last_class:
+                    break
+                last_class = combining_class
+                # C is a non-starter that is not blocked from S
+                y = self._entry(S + [C])
+                if y:
+                    lookup_key = lookup_key[:i] + lookup_key[i + 1:]
+                    entry = y
+                    break
+
+            if entry:
+                collation_elements.extend(self._elements_of(entry))
+            else:
+                codepoint = lookup_key.pop(0)
+                collation_elements.extend(self.implicit_weight(codepoint))
+
+        return collation_elements
+
+    def sort_key_from_collation_elements(self, collation_elements):
+        return tuple(
+            [p for p, s, t in collation_elements if p] + [0] +
+            [s for p, s, t in collation_elements if s] + [0] +
+            [t for p, s, t in collation_elements if t] + [0]
+        )
+
+    def sort_key(self, string):
+        normalized_string = unicodedata.normalize("NFD", string)
+        collation_elements = self.collation_elements(normalized_string)
+        return self.sort_key_from_collation_elements(collation_elements)
+
+    def implicit_weight(self, cp):
+        if (
+            0x4E00 <= cp <= 0x9FCC or
+            (self.CJK_IDEOGRAPHS_8_0_0 and 0x9FCD <= cp <= 0x9FD5) or
+            (self.CJK_IDEOGRAPHS_10_0_0 and 0x9FD6 <= cp <= 0x9FEA) or
+            cp in [
+                0xFA0E, 0xFA0F, 0xFA11, 0xFA13, 0xFA14, 0xFA1F,
+                0xFA21, 0xFA23, 0xFA24, 0xFA27, 0xFA28, 0xFA29,
+            ]
+        ):
+            base = 0xFB40
+            aaaa = base + (cp >> 15)
+            bbbb = (cp & 0x7FFF) | 0x8000
+        elif (
+            (self.CJK_IDEOGRAPHS_EXT_A and 0x3400 <= cp <= 0x4DB5) or
+            (self.CJK_IDEOGRAPHS_EXT_B and 0x20000 <= cp <= 0x2A6D6) or
+            (self.CJK_IDEOGRAPHS_EXT_C and 0x2A700 <= cp <= 0x2B734) or
+            (self.CJK_IDEOGRAPHS_EXT_D and 0x2B740 <= cp <= 0x2B81D) or
+            (self.CJK_IDEOGRAPHS_EXT_E and 0x2B820 <= cp <= 0x2CEAF) or
+            (self.CJK_IDEOGRAPHS_EXT_F and 0x2CEB0 <= cp <= 0x2EBE0)
+        ):
+            base = 0xFB80
+            if cp == 0x2CEA2:
+                base = 0xFBC0
+            aaaa = base + (cp >> 15)
+            bbbb = (cp & 0x7FFF) | 0x8000
+        else:
+            aaaa = None
+            for (start, end, base) in self.implicit_weights:
+                if start <= cp <= end:
+                    aaaa = base
+                    bbbb = (cp - start) | 0x8000
+                    break
+            if aaaa is None:
+                base = 0xFBC0
+                aaaa = base + (cp >> 15)
+                bbbb = (cp & 0x7FFF) | 0x8000
+
+        return [(aaaa, 0x0020, 0x0002), (bbbb, 0x0000, 0x0000)]
+
+    def build_lookup_key(self, text):
+        return [ord(ch) for ch in text]
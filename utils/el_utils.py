@@ -15,16 +15,22 @@
 #    import el_transliteration
 #    import el_utils as elu
 
-import os, sys, locale
+import os, sys
+import functools, threading, hashlib, contextlib
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from collections import OrderedDict, deque
+from pathlib import Path
 import unicodedataplus as ud
 import regex as re
 import codecs
-from tabulate import tabulate
-import grapheme
-from laonlp.tokenize import word_tokenize as lao_wt
-from pythainlp.tokenize import word_tokenize as thai_wt
+# Heavier dependencies are imported on first use, so that importing el_utils
+# stays fast in processes that only need a few functions:
+#    * PyICU (icu)
+#    * tabulate, grapheme
+#    * laonlp, pythainlp
 #from khmernltk import word_tokenize as khmer_wt
-from icu import BreakIterator, Locale, UnicodeString, Transliterator, UTransDirection
 # Code for internal testing and development:
 # libpath = os.path.expanduser('~/dev/i18n/libr/yale-lao')
 libpath = os.path.expanduser('./')
@@ -32,21 +38,90 @@ if libpath not in sys.path:
     sys.path.append(libpath)
 #import cesu8
 #from el_transliteration import transliteration_data
-locale.setlocale(locale.LC_ALL, "")
 
-ROOT_LOCALE = Locale.getRoot()
-# DEFAULT_LOCALE = Locale("en-AU.UTF8")
-DEFAULT_LOCALE = ROOT_LOCALE
+# ROOT_LOCALE, DEFAULT_LOCALE and SUPPORTED_LANGUAGES require PyICU, and are
+# created on first access.
+@functools.lru_cache(maxsize=None)
+def root_locale():
+    from icu import Locale
+    return Locale.getRoot()
+
+@functools.lru_cache(maxsize=None)
+def supported_languages():
+    from icu import BreakIterator
+    return list(BreakIterator.getAvailableLocales())
+
+def __getattr__(name):
+    if name == "ROOT_LOCALE":
+        return root_locale()
+    if name == "DEFAULT_LOCALE":
+        # DEFAULT_LOCALE = Locale("en-AU.UTF8")
+        return root_locale()
+    if name == "SUPPORTED_LANGUAGES":
+        return supported_languages()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Typecast string to a list, splitting characters
 def splitString(text):
     return list(text)
 
 def utf8len(text):
-    return len(text.encode('utf-8'))
+    return len(text) if text.isascii() else len(text.encode('utf-8'))
 
 def utf16len(text):
-    return len(text.encode('utf-16-le'))
+    return encoded_length(text, 'utf-16-le')
+
+# Bytes per codepoint in each encoding for U+0000-U+007F, U+0080-U+07FF,
+# U+0800-U+FFFF and supplementary characters. CESU-8 encodes supplementary
+# characters as a surrogate pair of two 3 byte sequences. Python's utf-16 and
+# utf-32 codecs also write a byte order mark, see ENCODING_BOM_LENGTHS.
+ENCODING_WIDTHS = {
+    "utf-8": (1, 2, 3, 4),
+    "cesu-8": (1, 2, 3, 6),
+    "utf-16": (2, 2, 2, 4),
+    "utf-16-le": (2, 2, 2, 4),
+    "utf-16-be": (2, 2, 2, 4),
+    "utf-32": (4, 4, 4, 4),
+    "utf-32-le": (4, 4, 4, 4),
+    "utf-32-be": (4, 4, 4, 4)
+}
+ENCODING_BOM_LENGTHS = {
+    "utf-16": 2,
+    "utf-32": 4
+}
+
+def encoding_name(encoding):
+    try:
+        name = codecs.lookup(encoding).name
+    except LookupError:
+        name = encoding.lower().replace("_", "-")
+    if name not in ENCODING_WIDTHS:
+        raise ValueError(f"Unsupported encoding: {encoding}")
+    return name
+
+def encoding_widths(encoding):
+    return ENCODING_WIDTHS[encoding_name(encoding)]
+
+# Bytes written as a byte order mark at the start of the encoded text
+def bom_length(encoding):
+    return ENCODING_BOM_LENGTHS.get(encoding_name(encoding), 0)
+
+# Length of text in bytes in a Unicode encoding. ASCII text, UTF-16 and UTF-32
+# lengths are calculated from codepoint counts without encoding the text. For
+# non-ASCII text in UTF-8 and CESU-8 the text is encoded to UTF-8 once, as the
+# C encoder is much faster than counting codepoints in each range in Python,
+# and CESU-8 adds 2 bytes per supplementary character. Includes the byte order
+# mark written by the utf-16 and utf-32 codecs.
+#    Usage: encoded_length("𞤀𞤣𞤤𞤢𞤥", "cesu-8")
+def encoded_length(text, encoding="utf-8"):
+    widths = encoding_widths(encoding)
+    bom = bom_length(encoding)
+    if text.isascii():
+        return bom + len(text) * widths[0]
+    supplementary = len(SUPPLEMENTARY_CHARACTERS.findall(text))
+    if widths[1] == widths[2]:
+        return bom + len(text) * widths[0] + supplementary * (widths[3] - widths[2])
+    return len(text.encode('utf-8')) + supplementary * (widths[3] - 4)
 
 # Replace values matching dictionary keys with values
 def replace_all(text, pattern_dict):
@@ -54,6 +129,63 @@ def replace_all(text, pattern_dict):
         text = text.replace(key, str(pattern_dict[key]))
     return text
 
+# MARC21 Normalisation Form (NFM)
+#    MARC21 character repertoire is NFD, except for a small set of Latin,
+#    Cyrillic and Arabic characters that remain precomposed.
+MARC21_RECOMPOSITIONS = {
+    # Latin variations between NFD and MNF
+    "\u004F\u031B": "\u01A0",
+    "\u006F\u031B": "\u01A1",
+    "\u0055\u031B": "\u01AF",
+    "\u0075\u031B": "\u01B0",
+    # Cyrillic variations between NFD and MNF
+    "\u0418\u0306": "\u0419",
+    "\u0438\u0306": "\u0439",
+    "\u0413\u0301": "\u0403",
+    "\u0433\u0301": "\u0453",
+    "\u0415\u0308": "\u0401",
+    "\u0435\u0308": "\u0451",
+    "\u0406\u0308": "\u0407",
+    "\u0456\u0308": "\u0457",
+    "\u041A\u0301": "\u040C",
+    "\u043A\u0301": "\u045C",
+    "\u0423\u0306": "\u040E",
+    "\u0443\u0306": "\u045E",
+    # Arabic variations between NFD and MNF
+    "\u0627\u0653": "\u0622",
+    "\u0627\u0654": "\u0623",
+    "\u0648\u0654": "\u0624",
+    "\u0627\u0655": "\u0625",
+    "\u064A\u0654": "\u0626"
+}
+
+# Table driven NFM normaliser.
+#    The recomposition table is compiled once into a single alternation, so each
+#    string needs an NFD pass followed by one substitution pass.
+#
+# Usage:
+#    nfm = MarcNormaliser()
+#    nfm.normalise("Ơ")
+#    list(nfm.normalise_many(records))
+class MarcNormaliser:
+    def __init__(self, table=None):
+        self.table = dict(MARC21_RECOMPOSITIONS if table is None else table)
+        # Longest sequences first, so that alternation order never hides a longer match
+        keys = sorted(self.table, key=len, reverse=True)
+        self.pattern = re.compile("|".join(re.escape(k) for k in keys))
+
+    def _recompose(self, match):
+        return self.table[match.group()]
+
+    def normalise(self, text):
+        return self.pattern.sub(self._recompose, ud.normalize("NFD", text))
+
+    # Lazily normalise an iterable of strings
+    def normalise_many(self, texts):
+        return map(self.normalise, texts)
+
+NFM_NORMALISER = MarcNormaliser()
+
 # Normalise to specified Unicode Normalisation Form, defaulting to NFC.
 # nf = NFC | NFKC | NFD | NFKD | NFM
 # NFM: Normalise strings according to MARC21 Character repetoire requirements
@@ -63,52 +195,55 @@ def normalise(nf, text):
     nf = nf.upper()
     if nf not in ["NFC", "NFKC", "NFD", "NFKD", "NFM"]:
         nf="NFC"
-    # MNF (Marc Normalisation Form)
-    def marc21_normalise(text):
-        # Normalise to NFD
-        text = ud.normalize("NFD", text)
-        # Latin variations between NFD and MNF
-        latn_rep = {
-            "\u004F\u031B": "\u01A0",
-            "\u006F\u031B": "\u01A1",
-            "\u0055\u031B": "\u01AF",
-            "\u0075\u031B": "\u01B0"
-        }
-        # Cyrillic variations between NFD and MNF
-        cyrl_rep = {
-            "\u0418\u0306": "\u0419",
-            "\u0438\u0306": "\u0439",
-            "\u0413\u0301": "\u0403",
-            "\u0433\u0301": "\u0453",
-            "\u0415\u0308": "\u0401",
-            "\u0435\u0308": "\u0451",
-            "\u0406\u0308": "\u0407",
-            "\u0456\u0308": "\u0457",
-            "\u041A\u0301": "\u040C",
-            "\u043A\u0301": "\u045C",
-            "\u0423\u0306": "\u040E",
-            "\u0443\u0306": "\u045E"
-        }
-        # Arabic variations between NFD and MNF
-        arab_rep = {
-            "\u0627\u0653": "\u0622",
-            "\u0627\u0654": "\u0623",
-            "\u0648\u0654": "\u0624",
-            "\u0627\u0655": "\u0625",
-            "\u064A\u0654": "\u0626"
-        }
-        # Only process strings containing characters that need replacing
-        if bool(re.search(r'[ouOU]\u031B', text)):
-            text = replace_all(text, latn_rep)
-        if bool(re.search(r'[\u0413\u041A\u0433\u043A]\u0301|[\u0418\u0423\u0438\u0443]\u0306|[\u0406\u0415\u0435\u0456]\u0308', text)):
-            text = replace_all(text, cyrl_rep)
-        if bool(re.search(r'[\u0627\u0648\u064A]\u0654|\u0627\u0655|\u0627\u0653', text)):
-            text = replace_all(text, arab_rep)
-        return text
     if nf == "NFM":
-        return marc21_normalise(text)
+        return NFM_NORMALISER.normalise(text)
     return ud.normalize(nf, text)
 
+# ICU Normalizer2 instances, created once per normalisation form
+ICU_NORMALISER_FORMS = {
+    "NFC": ("nfc", "COMPOSE"),
+    "NFKC": ("nfkc", "COMPOSE"),
+    "NFD": ("nfc", "DECOMPOSE"),
+    "NFKD": ("nfkc", "DECOMPOSE"),
+    "NFKC_CF": ("nfkc_cf", "COMPOSE")
+}
+ICU_NORMALISERS = {}
+
+def icu_normaliser(nf):
+    nf = nf.upper()
+    normaliser = ICU_NORMALISERS.get(nf)
+    if normaliser is None:
+        from icu import Normalizer2, UNormalizationMode2
+        name, mode = ICU_NORMALISER_FORMS[nf]
+        normaliser = ICU_NORMALISERS[nf] = Normalizer2.getInstance(None, name, getattr(UNormalizationMode2, mode))
+    return normaliser
+
+# Normalise an iterable of strings, yielding results lazily.
+#    Records that are already normalised are passed through without copying.
+#    nf = NFC | NFKC | NFD | NFKD | NFM
+#    engine = ud | icu
+#
+# Usage:
+#    for record in normalise_batch(open("titles.txt", encoding="utf-8"), "NFD", engine="icu"):
+#        ...
+def normalise_batch(texts, nf="NFC", engine="ud"):
+    nf = nf.upper()
+    if nf not in ["NFC", "NFKC", "NFD", "NFKD", "NFM"]:
+        nf="NFC"
+    if nf == "NFM":
+        return NFM_NORMALISER.normalise_many(texts)
+    if engine.lower() == "icu":
+        normaliser = icu_normaliser(nf)
+        quick_check = normaliser.quickCheck
+        from icu import UNormalizationCheckResult
+        YES = UNormalizationCheckResult.YES
+        def _normalise(text):
+            return text if quick_check(text) == YES else normaliser.normalize(text)
+    else:
+        def _normalise(text):
+            return text if ud.is_normalized(nf, text) else ud.normalize(nf, text)
+    return map(_normalise, texts)
+
 # codepoints in string
 # def codepoints(text, prefix=True):
 #     return ' '.join('U+{:04X}'.format(ord(c)) for c in text) if prefix else ' '.join('{:04X}'.format(ord(c)) for c in text)
@@ -124,15 +259,178 @@ def codepoints(text, prefix=True, extended=True):
     if extended:
         return ' '.join(f"U+{ord(c):04X} ({c})" for c in text) if prefix else ' '.join(f"{ord(c):04X} ({c})" for c in text)
     else:
-        return ' '.join('U+{:04X}'.format(ord(c)) for c in text) if prefix else ' '.join('{:04X}'.format(ord(c)) for c in text)
+        return ' '.join(map('U+{:04X}'.format if prefix else '{:04X}'.format, codepoint_array(text)))
 
 cp = codepoints
 
+# Grapheme clusters
+#    GraphemeEngine finds extended grapheme cluster boundaries using one of the
+#    backends in GRAPHEME_BACKENDS:
+#       regex    - regex \X, the default
+#       icu      - ICU character BreakIterator
+#       grapheme - grapheme package
+#    Backends may implement different versions of the Unicode segmentation rules,
+#    so the default stays regex \X, as used by graphemes() before. backend="fastest"
+#    times the available backends once on sample text and uses the quickest
+#    (see also benchmarks/bench_graphemes.py).
+#    Boundaries are found in one pass, and the other operations are based on them.
+#
+# Usage:
+#    gr_engine = grapheme_engine()
+#    gr_engine = grapheme_engine("fastest")
+#    gr_engine.length("ရန်ကုန်")
+#    list(gr_engine.offsets("ရန်ကုန်"))
+#    gr_engine.slice("ရန်ကုန်", 0, 2)
+#    gr_engine.reverse("עִבְרִית")
+#    gr_engine.truncate_to_bytes("ရန်ကုန်", 10)
+
+GRAPHEME_BACKENDS = ["regex", "icu", "grapheme"]
+DEFAULT_GRAPHEME_BACKEND = "regex"
+GRAPHEME_CLUSTER = re.compile(r'\X')
+GRAPHEME_TIMING_SAMPLE = [
+    "Nguyễn Văn Ước, Lịch sử Việt Nam",
+    "ရန်ကုန်ကွန်ပျူတာတက္ကသိုလ်",
+    "اللغة العربية رائعة",
+    "עִבְרִית חֲדָשָׁה",
+    "𞤀𞤣𞤤𞤢𞤥 𞤆𞤵𞤤𞤢𞤪 👩‍👩‍👧"
+] * 20
+
+def grapheme_backend_available(backend):
+    try:
+        __import__(backend)
+    except ImportError:
+        return False
+    return True
+
+# Quickest available backend on GRAPHEME_TIMING_SAMPLE, timed once per process
+@functools.lru_cache(maxsize=None)
+def fastest_grapheme_backend():
+    import timeit
+    timings = {}
+    for backend in GRAPHEME_BACKENDS:
+        if grapheme_backend_available(backend):
+            engine = GraphemeEngine(backend)
+            timings[backend] = min(timeit.repeat(lambda: [engine.boundaries(s) for s in GRAPHEME_TIMING_SAMPLE], number=1, repeat=3))
+    return min(timings, key=timings.get)
+
+class GraphemeEngine:
+    def __init__(self, backend=None):
+        if backend is None:
+            backend = DEFAULT_GRAPHEME_BACKEND
+        elif backend == "fastest":
+            backend = fastest_grapheme_backend()
+        if backend not in GRAPHEME_BACKENDS:
+            raise ValueError(f"Unsupported grapheme backend: {backend}")
+        self.backend = backend
+        self._boundaries = getattr(self, "_" + backend + "_boundaries")
+
+    def __repr__(self):
+        return "<GraphemeEngine backend:%s>" % self.backend
+
+    def _icu_boundaries(self, text):
+        with borrowed_break_iterator("", "character") as bi:
+            bi.setText(text)
+            to_index = utf16_offset_converter(text)
+            return [to_index(boundary) for boundary in bi] if to_index else list(bi)
+
+    def _regex_boundaries(self, text):
+        return [match.end() for match in GRAPHEME_CLUSTER.finditer(text)]
+
+    def _grapheme_boundaries(self, text):
+        import grapheme
+        return list(accumulate(map(len, grapheme.graphemes(text))))
+
+    # End offset of each grapheme cluster. ASCII text only combines CR LF.
+    def boundaries(self, text):
+        if text.isascii() and "\r\n" not in text:
+            return list(range(1, len(text) + 1))
+        return self._boundaries(text)
+
+    # Yield (start, end) offsets of each grapheme cluster
+    def offsets(self, text):
+        start = 0
+        for end in self.boundaries(text):
+            yield start, end
+            start = end
+
+    def graphemes(self, text):
+        return [text[start:end] for start, end in self.offsets(text)]
+
+    def length(self, text):
+        if text.isascii():
+            return len(text) - text.count("\r\n")
+        if self.backend == "regex":
+            return len(GRAPHEME_CLUSTER.findall(text))
+        return len(self._boundaries(text))
+
+    # Slice by grapheme cluster index, text[start:stop] counted in graphemes
+    def slice(self, text, start=None, stop=None):
+        boundaries = self.boundaries(text)
+        start, stop, step = slice(start, stop).indices(len(boundaries))
+        if start >= stop:
+            return ""
+        return text[boundaries[start - 1] if start else 0:boundaries[stop - 1]]
+
+    def reverse(self, text):
+        return "".join([text[start:end] for start, end in reversed(list(self.offsets(text)))])
+
+    # Longest prefix of whole grapheme clusters that fits in max_bytes when encoded.
+    #    Only the characters that can fit are measured, a codepoint at a time, and
+    #    the cut is moved back to the nearest grapheme cluster boundary. A boundary
+    #    depends on the characters before it and the character after it. The byte
+    #    order mark written by the utf-16 and utf-32 codecs counts towards max_bytes.
+    def truncate_to_bytes(self, text, max_bytes, encoding="utf-8"):
+        widths = encoding_widths(encoding)
+        max_bytes -= bom_length(encoding)
+        if max_bytes < 0:
+            return ""
+        if len(text) * widths[3] <= max_bytes:
+            return text
+        head = text[:max_bytes // widths[0] + 1]
+        if head.isascii():
+            cut = min(len(head), max_bytes // widths[0])
+        else:
+            sizes = accumulate(
+                widths[0] if c < 0x80 else widths[1] if c < 0x800 else widths[2] if c < 0x10000 else widths[3]
+                for c in map(ord, head)
+            )
+            cut = bisect_right(list(sizes), max_bytes)
+        if cut >= len(text):
+            return text
+        boundaries = self.boundaries(text[:cut + 1])
+        return text[:boundaries[bisect_right(boundaries, cut) - 1]] if boundaries[0] <= cut else ""
+
+    def truncate_many(self, texts, max_bytes, encoding="utf-8"):
+        return (self.truncate_to_bytes(text, max_bytes, encoding) for text in texts)
+
+@functools.lru_cache(maxsize=None)
+def grapheme_engine(backend=None):
+    return GraphemeEngine(backend)
+
 def graphemes(text):
-    return re.findall(r'\X',text)
+    return grapheme_engine().graphemes(text)
 
 gr = graphemes
 
+# Truncate text to fit a byte limit, for example a fixed width database column,
+# cutting only at grapheme cluster boundaries.
+#    encoding = utf-8 | cesu-8 | utf-16(-le|-be) | utf-32(-le|-be)
+#
+# Usage:
+#    truncate("Nguyễn Văn Ước", 12)
+#    truncate("𞤀𞤣𞤤𞤢𞤥 𞤆𞤵𞤤𞤢𞤪", 20, "cesu-8")
+#    list(truncate_many(df["title"], 255, "cesu-8"))
+def truncate(text, max_bytes, encoding="utf-8"):
+    return grapheme_engine().truncate_to_bytes(text, max_bytes, encoding)
+
+def truncate_many(texts, max_bytes, encoding="utf-8"):
+    return grapheme_engine().truncate_many(texts, max_bytes, encoding)
+
+# Reverse a string, keeping grapheme clusters intact
+#    Usage: reverse_string("עברית חדשה")
+def reverse_string(text, use_graphemes=True):
+    return grapheme_engine().reverse(text) if use_graphemes else text[::-1]
+
 # Prepend dotted circle to combining diacritics in a string
 # Input string, returns string
 def add_dotted_circle(text):
@@ -151,25 +449,145 @@ def isalpha_unicode(text):
     # Unicode Alphabetic derived property
     return bool(re.match(r'^\p{Alphabetic}+$', text))
 
+# Unicode property table
+#    Character properties (name, script, block, category, bidi) are looked up
+#    once per page of 256 codepoints, the first time a character in the page is
+#    needed. Script, block, category and bidi values are stored in array('H')
+#    columns indexing shared lists of values, names in a list per page.
+#
+# Usage:
+#    UNICODE_PROPERTY_TABLE.properties("ꕙ")
+#    UNICODE_PROPERTY_TABLE.script("ꕙ")
+
+UNICODE_PROPERTIES = ["name", "script", "block", "category", "bidi"]
+UNICODE_PROPERTY_FUNCTIONS = {
+    "script": ud.script,
+    "block": ud.block,
+    "category": ud.category,
+    "bidi": ud.bidirectional
+}
+
+class UnicodePropertyTable:
+    PAGE_SIZE = 256
+
+    def __init__(self):
+        self._values = {prop: [] for prop in UNICODE_PROPERTY_FUNCTIONS}
+        self._indexes = {prop: {} for prop in UNICODE_PROPERTY_FUNCTIONS}
+        self._pages = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._pages)
+
+    def _build_page(self, page_number):
+        chars = [chr(cp) for cp in range(page_number * self.PAGE_SIZE, (page_number + 1) * self.PAGE_SIZE)]
+        page = {"name": [ud.name(c, '') for c in chars]}
+        with self._lock:
+            for prop, func in UNICODE_PROPERTY_FUNCTIONS.items():
+                values, indexes = self._values[prop], self._indexes[prop]
+                column = array('H')
+                for value in map(func, chars):
+                    if value not in indexes:
+                        indexes[value] = len(values)
+                        values.append(value)
+                    column.append(indexes[value])
+                page[prop] = column
+            self._pages[page_number] = page
+        return page
+
+    def _lookup(self, c):
+        page_number, i = divmod(ord(c), self.PAGE_SIZE)
+        page = self._pages.get(page_number) or self._build_page(page_number)
+        return page, i
+
+    # (name, script, block, category, bidi) of a character, name is "" if unnamed
+    def properties(self, c):
+        page, i = self._lookup(c)
+        values = self._values
+        return (
+            page["name"][i],
+            values["script"][page["script"][i]],
+            values["block"][page["block"][i]],
+            values["category"][page["category"][i]],
+            values["bidi"][page["bidi"][i]]
+        )
+
+    def get(self, c, prop):
+        page, i = self._lookup(c)
+        return page[prop][i] if prop == "name" else self._values[prop][page[prop][i]]
+
+    def name(self, c):
+        return self.get(c, "name")
+
+    def script(self, c):
+        return self.get(c, "script")
+
+    def block(self, c):
+        return self.get(c, "block")
+
+    def category(self, c):
+        return self.get(c, "category")
+
+    def bidi(self, c):
+        return self.get(c, "bidi")
+
+UNICODE_PROPERTY_TABLE = UnicodePropertyTable()
+
+# Character inventory of a corpus
+#    Counts each character in an iterable of strings (or a single string) in one
+#    pass, then looks up properties once per distinct character. Missing values
+#    (None or NaN in a pandas Series) are skipped. Returns a list
+#    of rows in codepoint order, that can be passed to pandas.DataFrame.
+#
+# Usage:
+#    inventory = char_inventory(open("titles.txt", encoding="utf-8"))
+#    pd.DataFrame(char_inventory(df["title"]))
+def char_inventory(texts):
+    from collections import Counter
+    counts = Counter()
+    if isinstance(texts, str):
+        texts = [texts]
+    for text in texts:
+        if isinstance(text, str):
+            counts.update(text)
+    inventory = []
+    for c in sorted(counts):
+        name, script, block, category, bidi = UNICODE_PROPERTY_TABLE.properties(c)
+        inventory.append({
+            "char": c, "cp": "%04X" % ord(c), "count": counts[c], "name": name,
+            "script": script, "block": block, "category": category, "bidi": bidi
+        })
+    return inventory
+
 # table of codepoints in string, giving basic data on each charcater
 def udata(text):
+    from tabulate import tabulate
     print("String: " + text)
     data = []
     datahead = ["char", "cp", "name", "script", "block", "cat", "bidi"]
     for c in splitString(text):
-        if ud.name(c,'-')!='-':
-            data.append([c, "%04X"%(ord(c)), ud.name(c,'-'), ud.script(c), ud.block(c), ud.category(c), ud.bidirectional(c)])
+        name, script, block, category, bidi = UNICODE_PROPERTY_TABLE.properties(c)
+        if name:
+            data.append([c, "%04X"%(ord(c)), name, script, block, category, bidi])
     print(tabulate(data, headers=datahead, tablefmt='grid'))
 
-def stringLength(text):
+# Length of a string in characters, bytes, graphemes, syllables and words.
+#    Syllables are counted for languages supported by syllable_segmenter(),
+#    words are counted with the ICU word break iterator for lang.
+#
+# Usage:
+#    stringLength("ရန်ကုန်ကွန်ပျူတာတက္ကသိုလ်", lang="my")
+def stringLength(text, lang=""):
+    from tabulate import tabulate
     print("String: " + text)
     print("Codepoints: " +  codepoints(text))
+    stats = text_stats([text], lang)
     data = [
-        ['Characters', len(text)], 
-        ['Bytes', utf8len(text)], 
-        ['Graphemes', grapheme.length(text)],
-        ['Syllables', ""], 
-        ['Words', ""]
+        ['Characters', stats["codepoints"][0]], 
+        ['Bytes', stats["utf8"][0]], 
+        ['Graphemes', stats["graphemes"][0]],
+        ['Syllables', stats["syllables"][0] if "syllables" in stats else ""], 
+        ['Words', stats["words"][0]]
     ]
     datahead = ['Component', 'Count']
     print(tabulate(data, headers=datahead, tablefmt='grid'))
@@ -215,52 +633,78 @@ def uni_bytes_oracle_utf8(c):
 # Generate a table conatining byte sequences representing specified character in each Unicode encoding
 #   Usage: byteSequences("𞤁")
 def byteSequences(c, additional=[]):
+    from tabulate import tabulate
     print("Character: " + c)
-    print("Codepoint: " + "U+"+"%04X"%(ord(c)))
-    if ord(c) > 0xffff:
+    print("Codepoint: " + codepoints(c, extended=False))
+    if len(c) == 1 and ord(c) > 0xffff:
         print("Surrogate pair: " + surrogatePair(c))
-    data = [
-        ['utf-8', " ".join(["{:02x}".format(x) for x in bytes(c, 'utf-8')]).upper()], 
-        ['utf-16-le'," ".join(["{:02x}".format(x) for x in bytes(c, 'utf-16-le')]).upper()], 
-        ['utf-16-be'," ".join(["{:02x}".format(x) for x in bytes(c, 'utf-16-be')]).upper()], 
-        ['utf-32-le'," ".join(["{:02x}".format(x) for x in bytes(c, 'utf-32-le')]).upper()], 
-        ['utf-32-be'," ".join(["{:02x}".format(x) for x in bytes(c, 'utf-32-be')]).upper()]
-    ]
-    #if additional.lower() == "cesu-8":
-    if "cesu-8" in additional:
-        data.append(['cesu-8', " ".join(["{:02x}".format(x) for x in codecs.encode(c, 'cesu-8')]).upper()] )
+    encodings = BYTE_SEQUENCE_ENCODINGS[:5] + (["cesu-8"] if "cesu-8" in additional else [])
+    sequences = byte_sequences([c], encodings)
+    data = [[enc, sequences[enc][0]] for enc in encodings]
     datahead = ['Encoding', 'Byte sequence']
     print(tabulate(data, headers=datahead, tablefmt='grid'))
     return
 
+# Codepoints of a string as an array('I'), built from the UTF-32 encoding of
+# the string rather than character by character. Use numpy.frombuffer(a, dtype=numpy.uint32)
+# for a NumPy view of the array without copying.
+#    Usage: codepoint_array("ꕙꔤ")
+CODEPOINT_ARRAY_ENCODING = 'utf-32-le' if sys.byteorder == 'little' else 'utf-32-be'
+
+def codepoint_array(text):
+    a = array('I')
+    a.frombytes(text.encode(CODEPOINT_ARRAY_ENCODING, 'surrogatepass'))
+    return a
+
+# Encode text, using the CESU-8 codec in cesu8.py for cesu-8
+def encode_text(text, enc="utf-8"):
+    enc = enc.lower()
+    if enc in ("cesu-8", "cesu8", "cesu_8"):
+        import cesu8
+        return cesu8.encode(text)[0]
+    return text.encode(enc)
+
+# Codepoints and byte sequences for each string in an iterable, as columns of
+# space separated hexadecimal values, for auditing whole tables. Nothing is printed.
+#    encodings = list of utf-8, utf-16-le, utf-16-be, utf-32-le, utf-32-be, cesu-8
+#
+# Usage:
+#    data = byte_sequences(df["title"])
+#    df = df.assign(**data)
+#    byte_sequences(["ꕙꔤ", "𞤀"], ["utf-8", "cesu-8"])
+BYTE_SEQUENCE_ENCODINGS = ["utf-8", "utf-16-le", "utf-16-be", "utf-32-le", "utf-32-be", "cesu-8"]
+
+def byte_sequences(texts, encodings=BYTE_SEQUENCE_ENCODINGS, prefix=True):
+    texts = list(texts)
+    cp_format = 'U+{:04X}'.format if prefix else '{:04X}'.format
+    data = {"codepoints": [" ".join(map(cp_format, codepoint_array(text))) for text in texts]}
+    for enc in encodings:
+        data[enc] = [encode_text(text, enc).hex(" ").upper() for text in texts]
+    return data
+
 # Get list of unicode codepoints in a string
 #    Usage: uni_cp("ꕙꔤ")
 #           uni_cp("ꕙꔤ", False)
 def uni_cp(txt, prefix=True):
-    #return ["U+"+"%04X"%(ord(c)) for c in txt] if prefix else ["%04X"%(ord(c)) for c in txt]
-    return ['U+{:04X}'.format(ord(c)) for c in txt] if prefix else ['{:04X}'.format(ord(c)) for c in txt]
+    return list(map('U+{:04X}'.format if prefix else '{:04X}'.format, codepoint_array(txt)))
 
 # Get list of bytes that represent the string
 #    Usage: uni_bytes("ꕙꔤ")
 #           uni_bytes("ꕙꔤ", "utf-16-le")
+UNI_BYTES_ENCODINGS = {
+    "utf-8": "utf-8",
+    "utf-16-le": "utf-16-le", "utf-16le": "utf-16-le",
+    "utf-16-be": "utf-16-be", "utf-16be": "utf-16-be",
+    "utf-32-le": "utf-32-le", "utf-32le": "utf-32-le",
+    "utf-32-be": "utf-32-be", "utf-32be": "utf-32-be",
+    "cesu-8": "cesu-8"
+}
+
 def uni_bytes(txt, enc="utf-8"):
-    enc = enc.lower()
-    print(enc)
-    #if mode.lower() =="oracle":
-    #    return  uni_bytes_oracle_utf8(txt)
-    if enc == "utf-8":
-        return ["{:02x}".format(x) for x in bytes(txt, 'utf-8')]
-    elif enc == "utf-16-le" or enc == "utf-16le":
-        return ["{:02x}".format(x) for x in bytes(txt, 'utf-16-le')]
-    elif enc == "utf-16-be" or enc == "utf-16be":
-        return ["{:02x}".format(x) for x in bytes(txt, 'utf-16-be')]
-    elif enc == "utf-32-le" or enc == "utf-32le":
-        return ["{:02x}".format(x) for x in bytes(txt, 'utf-32-le')]
-    elif enc == "utf-32-be" or enc == "utf-32be":
-        return ["{:02x}".format(x) for x in bytes(txt, 'utf-32-be')]
-    elif enc == "cesu-8":
-        return ["{:02x}".format(x) for x in codecs.encode(txt, 'cesu-8')]
-    return ""
+    enc = UNI_BYTES_ENCODINGS.get(enc.lower())
+    if enc is None:
+        return ""
+    return encode_text(txt, enc).hex(" ").split()
 
 # Force escaped surrogate pairs to be convert ro characters
 #    Usage: surrogatesToChar("\u3AD8\u01DD")
@@ -381,56 +825,208 @@ def text_sanitise(s):
 #
 
 # SUPPORTED_LANGUAGES = ['bo', 'bo_CN', 'bo_IN', 'km', 'km_KH', 'lo', 'lo_LA', 'my', 'my_MM', 'th', 'th_TH']
-SUPPORTED_LANGUAGES = list(BreakIterator.getAvailableLocales())
+# SUPPORTED_LANGUAGES is the list of ICU break iterator locales, see supported_languages()
 SUPPORTED_ENGINES = ['icu', 'laonlp', 'thainlp']
 SUPPORTED_SEPERATORS = ['\u0020', '\u007C', '\u200B']
 SUPPORTED_NORMALISATION_FORMS = ['nfc', 'nfkc', 'nfd', 'nfkd', 'nfm']
 
 def laonlp_tokenise(s, sep):
+    from laonlp.tokenize import word_tokenize as lao_wt
     s = sep.join(lao_wt(s))
     s = re.sub(r"\s{2,}", " ", s)
     return re.sub(r'\s([?.!"](?:\s|$))', r'\1', s)
 
 #def thainlp_tokenise(s, sep):
+#    from pythainlp.tokenize import word_tokenize as thai_wt
 #    s = sep.join(thai_wt(s))
 #    s = re.sub(r"\s{2,}", " ", s)
 #    return re.sub(r'\s([?.!"](?:\s|$))', r'\1', s)
 
-def iterate_breaks(text, bi):
+#
+# Break iterator pool
+#    Break iterators are stateful and not thread safe. Each thread keeps its own
+#    bounded LRU cache of idle instances keyed by (locale, break type), and an
+#    instance is checked out of the cache while it is in use, so nested or
+#    interleaved users never share one. ICU shares the underlying rule and
+#    dictionary data between instances.
+#
+#    borrowed_break_iterator() checks an instance out for the duration of a with
+#    block and returns it to the cache afterwards. break_iterator() hands out an
+#    instance for the caller to keep, it can be returned with
+#    release_break_iterator().
+#
+#    Usage:
+#       with borrowed_break_iterator("th_TH", "word") as bi:
+#           words = list(iterate_breaks("สวัสดีครับ", bi))
+#       bi = break_iterator("th_TH", "word")
+#       list(iterate_breaks("สวัสดีครับ", bi))
+#       break_iterator_stats()
+#
+
+BREAK_ITERATOR_TYPES = {
+    "character": "createCharacterInstance",
+    "word": "createWordInstance",
+    "line": "createLineInstance",
+    "sentence": "createSentenceInstance",
+    "title": "createTitleInstance"
+}
+BREAK_ITERATOR_POOL_SIZE = 32
+
+class BreakIteratorPool:
+    def __init__(self, maxsize=BREAK_ITERATOR_POOL_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    # Idle instances for the current thread: OrderedDict of key -> list
+    def _cache(self):
+        cache = getattr(self._local, "cache", None)
+        if cache is None:
+            cache = self._local.cache = OrderedDict()
+            self._local.size = 0
+        return cache
+
+    # Check an instance out of the cache, creating one if none is idle
+    def acquire(self, lang, kind="word"):
+        key = (lang, kind)
+        cache = self._cache()
+        idle = cache.get(key)
+        if idle:
+            bi = idle.pop()
+            if not idle:
+                del cache[key]
+            self._local.size -= 1
+            with self._lock:
+                self.hits += 1
+            return bi
+        with self._lock:
+            self.misses += 1
+        from icu import BreakIterator, Locale
+        return getattr(BreakIterator, BREAK_ITERATOR_TYPES[kind])(Locale(lang))
+
+    # Return an instance to the cache, evicting the least recently used idle instances
+    def release(self, bi, lang, kind="word"):
+        key = (lang, kind)
+        cache = self._cache()
+        cache.setdefault(key, []).append(bi)
+        cache.move_to_end(key)
+        self._local.size += 1
+        while self._local.size > self.maxsize:
+            oldest, idle = next(iter(cache.items()))
+            idle.pop(0)
+            if not idle:
+                del cache[oldest]
+            self._local.size -= 1
+
+    @contextlib.contextmanager
+    def borrow(self, lang, kind="word"):
+        bi = self.acquire(lang, kind)
+        try:
+            yield bi
+        finally:
+            self.release(bi, lang, kind)
+
+    def stats(self):
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        return {"hits": hits, "misses": misses, "hit_rate": hits / lookups if lookups else 0.0}
+
+BREAK_ITERATOR_POOL = BreakIteratorPool()
+
+def break_iterator(lang, kind="word"):
+    return BREAK_ITERATOR_POOL.acquire(lang, kind)
+
+def release_break_iterator(bi, lang, kind="word"):
+    BREAK_ITERATOR_POOL.release(bi, lang, kind)
+
+def borrowed_break_iterator(lang, kind="word"):
+    return BREAK_ITERATOR_POOL.borrow(lang, kind)
+
+def break_iterator_stats():
+    return BREAK_ITERATOR_POOL.stats()
+
+# UBRK_WORD_NONE_LIMIT: word break rule statuses below this are spaces and punctuation
+UBRK_WORD_NONE_LIMIT = 100
+
+# ICU reports boundaries as UTF-16 offsets. Returns a function converting them
+# to Python string offsets, or None if the text has no supplementary characters.
+SUPPLEMENTARY_CHARACTERS = re.compile(r'[\U00010000-\U0010FFFF]')
+
+def utf16_offset_converter(text):
+    if text.isascii():
+        return None
+    surrogates = [m.start() + i for i, m in enumerate(SUPPLEMENTARY_CHARACTERS.finditer(text))]
+    if not surrogates:
+        return None
+    return lambda offset: offset - bisect_left(surrogates, offset)
+
+# Yield (start, end, rule_status) for each segment, without copying text.
+#    skip_none = True skips segments with a word break status of UBRK_WORD_NONE
+#    (spaces and punctuation), when used with a word break iterator.
+#
+# Usage:
+#    bi = break_iterator("th_TH", "word")
+#    for start, end, status in iterate_break_offsets(text, bi, skip_none=True):
+#        index(text, start, end)
+def iterate_break_offsets(text, bi, skip_none=False):
     bi.setText(text)
-    lastpos = 0
+    to_index = utf16_offset_converter(text)
+    start = 0
     while True:
-        next_boundary = bi.nextBoundary()
-        if next_boundary == -1: return
-        yield text[lastpos:next_boundary]
-        lastpos = next_boundary
+        boundary = bi.nextBoundary()
+        if boundary == -1: return
+        end = to_index(boundary) if to_index else boundary
+        status = bi.getRuleStatus()
+        if not (skip_none and status < UBRK_WORD_NONE_LIMIT):
+            yield start, end, status
+        start = end
+
+# Segment offsets as a flat array('I') of (start, end, rule_status) triples
+def break_offsets(text, bi, skip_none=False):
+    offsets = array('I')
+    for segment in iterate_break_offsets(text, bi, skip_none):
+        offsets.extend(segment)
+    return offsets
+
+def iterate_breaks(text, bi):
+    for start, end, status in iterate_break_offsets(text, bi):
+        yield text[start:end]
 
 def icu_tokenise(s, l, sep):
     if l.lower() == "lo":
-        bi = BreakIterator.createWordInstance(Locale('lo_LA'))
+        loc = 'lo_LA'
     if l.lower() == "th":
-        bi = BreakIterator.createWordInstance(Locale('th_TH'))
-    s = sep.join(list(iterate_breaks(s, bi)))
+        loc = 'th_TH'
+    with borrowed_break_iterator(loc, "word") as bi:
+        s = sep.join(iterate_breaks(s, bi))
     s = re.sub(r"\s{2,}", " ", s)
     s = re.sub(r'\s([?.!"](?:\s|$))', r'\1', s)
     return s
 
-def segment_words(text, engine="icu", lang="", sep="\u0020"):
+# Validate segmentation options, returning normalised engine and language
+def segmentation_options(engine, lang, sep):
     engine = engine.lower()
     lang = lang.replace("-", "_").split('.')[0]
     if engine not in SUPPORTED_ENGINES:
         print("Unsupported tokenisation engine specified", file=sys.stderr)
         sys.exit(1)
-    if lang not in SUPPORTED_LANGUAGES:
+    if lang not in supported_languages():
         print("Unsupported language specified", file=sys.stderr)
         sys.exit(1)
     if sep not in SUPPORTED_SEPERATORS:
         print("Unsupported token separator", file=sys.stderr)
         sys.exit(1)
+    return engine, lang
+
+def segment_words(text, engine="icu", lang="", sep="\u0020"):
+    engine, lang = segmentation_options(engine, lang, sep)
     if engine == "icu":
         # return icu_tokenise(text, lang, sep)
-        bi = BreakIterator.createWordInstance(Locale(lang))
-        text = sep.join(list(iterate_breaks(text, bi)))
+        with borrowed_break_iterator(lang, "word") as bi:
+            text = sep.join(iterate_breaks(text, bi))
         text = re.sub(r"\s{2,}", " ", text)
         text = re.sub(r'\s([?.!"](?:\s|$))', r'\1', text)
         return text
@@ -439,6 +1035,269 @@ def segment_words(text, engine="icu", lang="", sep="\u0020"):
     # if engine == "thainlp" and lang[0:2] == "th":
     #     return thainlp_tokenise(text, sep)
 
+#
+# Corpus segmentation
+#    Segments a corpus line by line across a pool of worker processes. Lines are
+#    sent to workers in chunks, each worker keeps its own cached break iterators
+#    or tokeniser models, and segmented lines are yielded in input order.
+#
+#    corpus = path of a UTF-8 text file, or an iterable whose items are either
+#             pathlib.Path objects (files to read) or strings (one record each)
+#
+# Usage:
+#    for line in segment_corpus("lo_titles.txt", "lo", engine="icu", workers=4):
+#        print(line)
+#    segment_corpus_to_file([Path("th_1.txt"), Path("th_2.txt")], "th_segmented.txt", "th")
+#
+
+SEGMENT_CORPUS_CHUNK_SIZE = 1000
+
+def corpus_lines(corpus):
+    if isinstance(corpus, (str, os.PathLike)):
+        corpus = [Path(corpus)]
+    for item in corpus:
+        if isinstance(item, os.PathLike):
+            with open(item, encoding="utf-8") as f:
+                for line in f:
+                    yield line.rstrip("\r\n")
+        else:
+            yield item
+
+def _chunks(items, size):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+# Apply func(chunk, *args) to each chunk across a pool of worker processes,
+# yielding results in input order. A bounded number of chunks is kept in flight,
+# so memory use stays flat. With one worker, chunks are processed in this process.
+def ordered_pool_map(func, chunks, workers, *args):
+    if workers == 1:
+        for chunk in chunks:
+            yield func(chunk, *args)
+        return
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(func, chunk, *args))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def _segment_chunk(lines, engine, lang, sep):
+    return [segment_words(line, engine=engine, lang=lang, sep=sep) for line in lines]
+
+def segment_corpus(corpus, lang, engine="icu", workers=None, sep="\u0020", chunk_size=SEGMENT_CORPUS_CHUNK_SIZE):
+    engine, lang = segmentation_options(engine, lang, sep)
+    chunks = _chunks(corpus_lines(corpus), chunk_size)
+    workers = workers or os.cpu_count() or 1
+    for lines in ordered_pool_map(_segment_chunk, chunks, workers, engine, lang, sep):
+        yield from lines
+
+# Write segmented corpus to a file, one record per line. Returns number of lines written.
+def segment_corpus_to_file(corpus, output_path, lang, engine="icu", workers=None, sep="\u0020", chunk_size=SEGMENT_CORPUS_CHUNK_SIZE):
+    count = 0
+    with open(output_path, "w", encoding="utf-8") as out:
+        for line in segment_corpus(corpus, lang, engine=engine, workers=workers, sep=sep, chunk_size=chunk_size):
+            out.write(line + "\n")
+            count += 1
+    return count
+
+#
+# Custom break rules
+#    Builds RuleBasedBreakIterators from the RBBI rule files in the repository.
+#    Compiling rule source is slow, so compiled binary rules are cached on disk,
+#    keyed by a hash of the rule source and the ICU version, and in memory.
+#    Set the EL_UTILS_CACHE environment variable to change the cache location.
+#
+# Usage:
+#    bi = rbbi_break_iterator("Lao")
+#    bi = rbbi_break_iterator("/path/to/custom.rbbi")
+#    list(iterate_breaks("ສະບາຍດີ", bi))
+#
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RBBI_RULE_FILES = {
+    "Default": "data/rbbi/lucene/uax29/Default.rbbi",
+    "Hebrew": "data/rbbi/solrcene/Hebrew.rbbi",
+    "Khmer": "data/rbbi/solrcene/Khmer.rbbi",
+    "Lao": "data/rbbi/Lao.rbbi",
+    "Myanmar": "data/rbbi/solrcene/Myanmar.rbbi",
+    "MyanmarSyllable": "data/rbbi/lucene/uax29/MyanmarSyllable.rbbi"
+}
+RBBI_CACHE_DIR = os.path.join(os.environ.get("EL_UTILS_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "el_utils")), "rbbi")
+RBBI_BINARY_RULES = {}
+
+def rbbi_rule_path(rules):
+    if rules in RBBI_RULE_FILES:
+        return os.path.join(REPO_ROOT, RBBI_RULE_FILES[rules])
+    return os.fspath(rules)
+
+# Compiled binary rules for a named rule set or an RBBI file path
+def rbbi_binary_rules(rules):
+    from icu import RuleBasedBreakIterator, ICU_VERSION
+    path = rbbi_rule_path(rules)
+    with open(path, "rb") as f:
+        source = f.read()
+    digest = hashlib.sha256(source).hexdigest()[:16]
+    key = (digest, ICU_VERSION)
+    binary = RBBI_BINARY_RULES.get(key)
+    if binary is not None:
+        return binary
+    stem = os.path.splitext(os.path.basename(path))[0]
+    cache_file = os.path.join(RBBI_CACHE_DIR, f"{stem}-{digest}-icu{ICU_VERSION}.brk")
+    try:
+        with open(cache_file, "rb") as f:
+            binary = f.read()
+    except OSError:
+        binary = RuleBasedBreakIterator(source.decode("utf-8")).getBinaryRules()
+        try:
+            os.makedirs(RBBI_CACHE_DIR, exist_ok=True)
+            tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+            with open(tmp_file, "wb") as f:
+                f.write(binary)
+            os.replace(tmp_file, cache_file)
+        except OSError:
+            pass
+    # ICU reads the binary rules in place, so they are kept alive for the
+    # lifetime of the process
+    RBBI_BINARY_RULES[key] = binary
+    return binary
+
+# New break iterator for custom rules. Construction from binary rules is cheap.
+def rbbi_break_iterator(rules):
+    from icu import RuleBasedBreakIterator
+    return RuleBasedBreakIterator(rbbi_binary_rules(rules))
+
+#
+# Syllable segmentation
+#    Myanmar syllables are found with a precompiled regular expression, each
+#    match marking the start of a syllable. Khmer and Lao, and Myanmar with
+#    engine="rbbi", use the syllable rules in rules/segmentation/syllables.
+#
+# Usage:
+#    my = syllable_segmenter("my")
+#    my.segment("ရန်ကုန်ကွန်ပျူတာတက္ကသိုလ်")
+#    list(my.spans("ရန်ကုန်"))
+#    my.count("မြန်မာ စာ၊ ၁၉၈၅", skip_none=True)
+#    list(syllable_segmenter("lo").segment_many(titles))
+#
+
+SYLLABLE_PATTERNS = {
+    "my": r'(?:(?<!္)([က-ဪဿ၊-၏]|[၀-၉]+|[^က-၏]+)(?![ှျ]?[့္်]))'
+}
+SYLLABLE_RULE_FILES = {
+    "km": "rules/segmentation/syllables/Khmer.rbbi",
+    "lo": "rules/segmentation/syllables/Lao.rbbi",
+    "my": "rules/segmentation/syllables/Myanmar.rbbi"
+}
+# Segments without a letter or mark (spaces, punctuation, digits) are not syllables
+SYLLABLE_CONTENT = re.compile(r'[\p{L}\p{M}]')
+
+class SyllableSegmenter:
+    def __init__(self, lang="my", engine=None):
+        self.lang = lang.replace("-", "_").split("_")[0]
+        if engine is None:
+            engine = "regex" if self.lang in SYLLABLE_PATTERNS else "rbbi"
+        self.engine = engine.lower()
+        if self.engine == "regex":
+            self.pattern = re.compile(SYLLABLE_PATTERNS[self.lang])
+        else:
+            self.rules = os.path.join(REPO_ROOT, SYLLABLE_RULE_FILES[self.lang])
+            self._local = threading.local()
+
+    def __repr__(self):
+        return "<SyllableSegmenter lang:%s, engine:%s>" % (self.lang, self.engine)
+
+    # Yield (start, end) offsets of each syllable
+    #    skip_none = True skips segments without a letter or mark
+    def spans(self, text, skip_none=False):
+        spans = self._regex_spans(text) if self.engine == "regex" else self._rbbi_spans(text)
+        if skip_none:
+            return ((start, end) for start, end in spans if SYLLABLE_CONTENT.search(text, start, end))
+        return spans
+
+    # Each match starts a syllable, text before the first match is a segment
+    def _regex_boundaries(self, text):
+        boundaries = [match.start() for match in self.pattern.finditer(text)]
+        if not boundaries or boundaries[0] != 0:
+            boundaries.insert(0, 0)
+        boundaries.append(len(text))
+        return boundaries
+
+    def _regex_spans(self, text):
+        boundaries = self._regex_boundaries(text)
+        return ((start, end) for start, end in zip(boundaries, boundaries[1:]) if start < end)
+
+    def _rbbi_spans(self, text):
+        bi = getattr(self._local, "bi", None)
+        if bi is None:
+            bi = self._local.bi = rbbi_break_iterator(self.rules)
+        for start, end, status in iterate_break_offsets(text, bi):
+            yield start, end
+
+    def segment(self, text):
+        if self.engine == "regex":
+            boundaries = self._regex_boundaries(text)
+            return [text[start:end] for start, end in zip(boundaries, boundaries[1:]) if start < end]
+        return [text[start:end] for start, end in self.spans(text)]
+
+    def segment_many(self, texts):
+        return map(self.segment, texts)
+
+    def count(self, text, skip_none=False):
+        return sum(1 for span in self.spans(text, skip_none))
+
+@functools.lru_cache(maxsize=None)
+def syllable_segmenter(lang="my", engine=None):
+    return SyllableSegmenter(lang, engine)
+
+# Text statistics
+#    Counts codepoints, UTF-8 and UTF-16 bytes, graphemes, syllables and words
+#    for each string in an iterable. Returns a dict of array('L') columns, one
+#    value per string, that can be used directly as pandas columns. The
+#    syllables column is only present for languages supported by
+#    syllable_segmenter(). Spaces, punctuation and digits are not counted as
+#    syllables. Spaces and punctuation are not counted as words, numbers are
+#    (UBRK_WORD_NUMBER). Segmenters are created once and reused for all strings.
+#    Trailing newlines, as in lines read from a file, are not counted.
+#
+# Usage:
+#    stats = text_stats(df["title"], lang="my")
+#    df = df.assign(**stats)
+#    pd.DataFrame(text_stats(open("titles.txt", encoding="utf-8"), "lo")).describe()
+
+def text_stats(texts, lang=""):
+    base = lang.replace("-", "_").split("_")[0].lower()
+    syllables = syllable_segmenter(base) if base in SYLLABLE_RULE_FILES else None
+    gr_engine = grapheme_engine()
+    stats = {name: array('L') for name in ["codepoints", "utf8", "utf16", "graphemes", "words"]}
+    if syllables:
+        stats["syllables"] = array('L')
+    with borrowed_break_iterator(lang.replace("-", "_"), "word") as bi:
+        for text in texts:
+            text = text.rstrip("\n")
+            n = len(text)
+            stats["codepoints"].append(n)
+            if text.isascii():
+                stats["utf8"].append(n)
+                stats["utf16"].append(2 * n)
+            else:
+                stats["utf8"].append(len(text.encode('utf-8')))
+                stats["utf16"].append(len(text.encode('utf-16-le')))
+            stats["graphemes"].append(gr_engine.length(text))
+            if syllables:
+                stats["syllables"].append(syllables.count(text, skip_none=True))
+            stats["words"].append(sum(1 for segment in iterate_break_offsets(text, bi, skip_none=True)))
+    return stats
+
 #
 # Transliteration
 #
@@ -591,14 +1450,11 @@ def is_number(v, sep = (",", ".")):
 #      * Two parameters added to assist in changing matplotlib tick labels: p and scale parameters.
 #        These two parameters should be ignored in all other cases.
 
-# import locale
 def convert_numeral_systems(n, p=None, system_out="", system_in="latn", decimal=2, sep_in=["", "."], sep_out=["", "."], scale=None):
-    locale.setlocale(locale.LC_ALL, "en_US.UTF-8")
     decimal_places = decimal
     if system_in == "latn" and sep_in == ["", "."]:
         n = n / scale if scale else n
-        format_string = '%0.' + str(decimal_places) + 'f' if type(n) == float else '%d'
-        n = locale.format_string(format_string, n, grouping=True, monetary=True)
+        n = format(n, f",.{decimal_places}f") if type(n) == float else format(int(n), ",d")
         n = n.replace(",", "ṯ").replace(".", "ḏ")
         #n = str(n)
     if sep_in[0] in [" ", ",", "٬", "\u2009"]:
@@ -675,7 +1531,6 @@ def convert_numeral_systems(n, p=None, system_out="", system_in="latn", decimal=
     except KeyError:
         sep = sep_out
     t = n.maketrans(data[system_in]["digits"], data[system_out]["digits"])
-    locale.setlocale(locale.LC_ALL, "")
     return n.translate(t).replace("ṯ", sep[0] ).replace("ḏ", sep[1])
 
 
@@ -684,8 +1539,9 @@ def convert_numeral_systems(n, p=None, system_out="", system_in="latn", decimal=
 #   pass string, case (lower, upper, title, casefold), and icu.Locale object.
 #   Return string either casefolded or converted to appropriate case.
 def casing(text, case="lower", loc=None):
+    from icu import UnicodeString
     if loc == None:
-        loc = ROOT_LOCALE
+        loc = root_locale()
     case = case.lower()
     if case == "lower":
         text = str(UnicodeString(text).toLower(loc))
@@ -704,17 +1560,52 @@ def casing(text, case="lower", loc=None):
 def caseless_match(x, y):
   return x.casefold() == y.casefold()
 
+# Caseless match keys, cached for repeated strings
+@functools.lru_cache(maxsize=65536)
+def canonical_caseless_key(x):
+  return ud.normalize("NFD", ud.normalize("NFD", x).casefold())
+
+@functools.lru_cache(maxsize=65536)
+def compatibility_caseless_key(x):
+  return ud.normalize("NFKD", ud.normalize("NFKD", ud.normalize("NFD", x).casefold()).casefold())
+
+DEFAULT_IGNORABLE = re.compile(r"\p{Default_Ignorable_Code_Point=Yes}")
+
+# ICU nfkc_cf normaliser, or None if PyICU is not available. Looked up once.
+@functools.lru_cache(maxsize=None)
+def nfkc_cf_normaliser():
+  try:
+    return icu_normaliser("NFKC_CF")
+  except ImportError:
+    return None
+
+# toNFKC_Casefold
+#    engine = icu | ud
+#    The ICU nfkc_cf normaliser removes Default_Ignorable_Code_Point characters,
+#    the ud engine removes them before applying NFKC, casefolding and NFC. The ud
+#    engine is used when PyICU is not available.
+def NFKC_Casefold(s, engine="icu"):
+  if engine == "icu":
+    normaliser = nfkc_cf_normaliser()
+    if normaliser is not None:
+      return normaliser.normalize(s)
+  return ud.normalize("NFC", ud.normalize('NFKC', DEFAULT_IGNORABLE.sub('', s)).casefold())
+
+def NFKC_Casefold_batch(texts, engine="icu"):
+  return map(lambda s: NFKC_Casefold(s, engine), texts)
+
+@functools.lru_cache(maxsize=65536)
+def identifier_caseless_key(x):
+  return NFKC_Casefold(ud.normalize("NFD", x))
+
 def canonical_caseless_match(x, y):
-  return ud.normalize("NFD", ud.normalize("NFD", x).casefold()) == ud.normalize("NFD", ud.normalize("NFD", y).casefold())
+  return canonical_caseless_key(x) == canonical_caseless_key(y)
 
 def compatibility_caseless_match(x, y):
-  return ud.normalize("NFKD", ud.normalize("NFKD", ud.normalize("NFD", x).casefold()).casefold()) == ud.normalize("NFKD", ud.normalize("NFKD", ud.normalize("NFD", y).casefold()).casefold())
-
-def NFKC_Casefold(s):
-  return ud.normalize("NFC", ud.normalize('NFKC', s).casefold())
+  return compatibility_caseless_key(x) == compatibility_caseless_key(y)
 
 def identifier_caseless_match(x, y):
-  return NFKC_Casefold(ud.normalize("NFD", x)) == NFKC_Casefold(ud.normalize("NFD", y))
+  return identifier_caseless_key(x) == identifier_caseless_key(y)
 
 # Clean up presentation forms in data
 #    Converts presentation forms to appropriate standard characters
@@ -741,32 +1632,145 @@ def clean_diacritics(text, nf="nfc"):
         return ud.normalize(nf.upper(), text)
     return ud.normalize(nf.upper(), re.sub(r'(\p{Mn})\1+', r'\1', ud.normalize("NFD", text)))
 
-def data_check(text, nf="NFC"):
-    print("Data check ...")
-    if has_doubled_diacritics(text):
-        print("* String has repeated contiguous diacritics.")
-    if has_presentation_forms(text):
-        print("* Presentation forms in string.")
-    if bool(re.findall(r'\p{N}', text)) and bool(re.findall(r'[^0-9]', text)):
-        print("* Non-Arabic numerals present in string")
-    if ud.is_normalized("NFC", text) or ud.is_normalized("NFKC", text):
-        print("* String uses precomposed characters")
-    elif ud.is_normalized("NFD", text) or ud.is_normalized("NFKD", text):
-        print("* String uses decomposed characters")
-    print("Codepoints: ", codepoints(text))
-    print("Unicode scripts: ", list(set([ud.script(a) for a in text])))
-
-
-
-
+# Data checks
+#    DataChecker runs all checks on a record with a single scan of a combined
+#    regular expression, plus normalisation quick checks:
+#       doubled_diacritics   - repeated contiguous combining marks (in NFD)
+#       presentation_forms   - Alphabetic and Arabic presentation forms, except
+#                              U+FEFF, which is in the Arabic Presentation Forms-B block
+#       non_arabic_numerals  - numerals other than 0-9
+#       bidi_overrides       - LRO (U+202D) or RLO (U+202E)
+#       bom                  - byte order mark at start of record
+#       precomposed          - record is NFC, but not NFD
+#       decomposed           - record is NFD, but not NFC
+#       mixed_normalisation  - record is neither NFC nor NFD
+#    check() accepts an iterable of strings, a file path (one record per line),
+#    or a pandas Series or mapping, and returns an aggregate report with the
+#    number of records failing each check, sample row ids for each check, and
+#    the number of records using each script. Row ids are positions in the
+#    iterable or file, or index labels of a Series or mapping. Values that are
+#    not strings (None or NaN in a Series) are not checked, but counted, with
+#    sample row ids, under "missing".
+#
+# Usage:
+#    checker = DataChecker(workers=4)
+#    report = checker.check(df["title"])
+#    report["checks"]["presentation_forms"]["samples"]
+#    checker.check_record("Trá́ce, ﬁnd an oﬃce: ٣")
+
+DATA_CHECKS = [
+    "doubled_diacritics", "presentation_forms", "non_arabic_numerals", "bidi_overrides",
+    "bom", "precomposed", "decomposed", "mixed_normalisation"
+]
+DATA_CHECK_PATTERN = re.compile(
+    r'(?P<bom>\A\uFEFF)'
+    r'|(?P<doubled_diacritics>(?P<mark>\p{Mn})(?P=mark)+)'
+    r'|(?P<presentation_forms>(?!\uFEFF)[\p{InAlphabetic_Presentation_Forms}\p{InArabic_Presentation_Forms-A}\p{InArabic_Presentation_Forms-B}])'
+    r'|(?P<non_arabic_numerals>[^\P{N}0-9])'
+    r'|(?P<bidi_overrides>[\u202D\u202E])'
+)
+DOUBLED_DIACRITICS = re.compile(r'(\p{Mn})\1+')
+DATA_CHECK_CHUNK_SIZE = 1000
+DATA_CHECK_MAX_SAMPLES = 10
+
+def check_record(text):
+    if text.isascii():
+        return set()
+    found = {m.lastgroup for m in DATA_CHECK_PATTERN.finditer(text)}
+    is_nfc = ud.is_normalized("NFC", text)
+    is_nfd = ud.is_normalized("NFD", text)
+    if not is_nfd and "doubled_diacritics" not in found and DOUBLED_DIACRITICS.search(ud.normalize("NFD", text)):
+        found.add("doubled_diacritics")
+    if is_nfc != is_nfd:
+        found.add("precomposed" if is_nfc else "decomposed")
+    elif not is_nfc:
+        found.add("mixed_normalisation")
+    return found
+
+def _empty_report():
+    return {
+        "records": 0,
+        "missing": {"count": 0, "samples": []},
+        "checks": {check: {"count": 0, "samples": []} for check in DATA_CHECKS},
+        "scripts": {}
+    }
 
-# add checks:
-#    * RLO and LRO in string
-#    * BOM at start of string
-#    * check if data is precomposed (nfc, nfkc) or decomposed (nfd, nfkd)
+def _check_chunk(rows, max_samples):
+    report = _empty_report()
+    checks, scripts = report["checks"], report["scripts"]
+    script = UNICODE_PROPERTY_TABLE.script
+    missing = report["missing"]
+    for row_id, text in rows:
+        report["records"] += 1
+        if not isinstance(text, str):
+            missing["count"] += 1
+            if len(missing["samples"]) < max_samples:
+                missing["samples"].append(row_id)
+            continue
+        for check in check_record(text):
+            checks[check]["count"] += 1
+            if len(checks[check]["samples"]) < max_samples:
+                checks[check]["samples"].append(row_id)
+        for name in {script(c) for c in set(text)}:
+            scripts[name] = scripts.get(name, 0) + 1
+    return report
+
+def _merge_reports(report, partial, max_samples):
+    report["records"] += partial["records"]
+    results = [(report["missing"], partial["missing"])]
+    results.extend((report["checks"][check], result) for check, result in partial["checks"].items())
+    for merged, result in results:
+        merged["count"] += result["count"]
+        merged["samples"].extend(result["samples"][:max_samples - len(merged["samples"])])
+    for name, count in partial["scripts"].items():
+        report["scripts"][name] = report["scripts"].get(name, 0) + count
+    return report
+
+class DataChecker:
+    def __init__(self, workers=1, chunk_size=DATA_CHECK_CHUNK_SIZE, max_samples=DATA_CHECK_MAX_SAMPLES):
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.max_samples = max_samples
+
+    def __repr__(self):
+        return "<DataChecker workers:%s>" % self.workers
+
+    def check_record(self, text):
+        return check_record(text)
+
+    def rows(self, records):
+        if hasattr(records, "items"):
+            return iter(records.items())
+        return enumerate(corpus_lines(records))
+
+    def check(self, records):
+        report = _empty_report()
+        chunks = _chunks(self.rows(records), self.chunk_size)
+        for partial in ordered_pool_map(_check_chunk, chunks, self.workers, self.max_samples):
+            _merge_reports(report, partial, self.max_samples)
+        return report
+
+DATA_CHECK_MESSAGES = {
+    "doubled_diacritics": "String has repeated contiguous diacritics.",
+    "presentation_forms": "Presentation forms in string.",
+    "non_arabic_numerals": "Non-Arabic numerals present in string",
+    "bidi_overrides": "String contains LRO or RLO bidi override characters",
+    "bom": "String starts with a BOM",
+    "precomposed": "String uses precomposed characters",
+    "decomposed": "String uses decomposed characters",
+    "mixed_normalisation": "String mixes precomposed and decomposed characters"
+}
 
 # Test string
 #     a = "Trá́ce, ﬁnd an oﬃce: ٣"
 #     data_check(a)
+def data_check(text, nf="NFC"):
+    print("Data check ...")
+    found = check_record(text)
+    for check in DATA_CHECKS:
+        if check in found:
+            print("* " + DATA_CHECK_MESSAGES[check])
+    print("Codepoints: ", codepoints(text))
+    print("Unicode scripts: ", list(set([UNICODE_PROPERTY_TABLE.script(a) for a in set(text)])))
 
 
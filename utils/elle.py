@@ -14,17 +14,13 @@ except ImportError as e:
 # https://github.com/iwsfutcmd/unicodedataplus
 # https://pypi.org/project/unicodedataplus/
 
+import os, functools, threading, hashlib
+import bisect, heapq, operator
 import regex as re
 # https://bitbucket.org/mrabarnett/mrab-regex
 # https://pypi.org/project/regex/
 
-try:
-    import grapheme
-except ImportError as e:
-    print(e)
-    print("Install grapheme package")
-# https://github.com/alvinlindstam/grapheme
-# https://pypi.org/project/grapheme/
+from el_utils import grapheme_engine
 
 # import tangled_up_in_unicode as ucd
 # https://github.com/dylan-profiler/tangled-up-in-unicode
@@ -146,240 +142,366 @@ language_tailorings = {
     "tw-GH":"ak"
 }
 
-class trk:
-    def __init__(self, s, unf="NFD"):
-        self.unf = unf.upper()
-        self.s = normalise(self.unf, self.s)
-    
+#################################################################
+#
+# Collator registry
+#
+#     Resolves a BCP-47 language tag to a collation tailoring and builds each
+#     RuleBasedCollator once. For each tag, and the tag with subtags removed
+#     from the end, the registry looks for:
+#         1. <tag>_rules in rules/collation/collation_rules.py
+#         2. an alias in language_tailorings, used to look up <alias>_rules in
+#            collation_rules.py, then collation_tailorings[alias]
+#     Tags without a tailoring use the ICU collator for the locale.
+#
+#     Compiled collators are cached in memory and on disk as binary rules
+#     (RuleBasedCollator.cloneBinary), keyed by a hash of the rules and the ICU
+#     version. Collators are not thread safe, so each thread gets its own
+#     instance, created cheaply from the binary rules.
+#     Set the EL_UTILS_CACHE environment variable to change the cache location.
+#
+#     Usage:
+#         collator = collator_for("shn")
+#         sorted(words, key=collator.getSortKey)
+#         COLLATOR_REGISTRY.tailoring("tw-GH")
+#
+#################################################################
+
+COLLATION_RULES_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "rules", "collation", "collation_rules.py")
+COLLATION_CACHE_DIR = os.path.join(os.environ.get("EL_UTILS_CACHE", os.path.expanduser("~/.cache/el_utils")), "collation")
+
+@functools.lru_cache(maxsize=None)
+def collation_rules_module(path=COLLATION_RULES_PATH):
+    import importlib.util
+    spec = importlib.util.spec_from_file_location("collation_rules", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def _tag_fallbacks(tag):
+    subtags = tag.replace("_", "-").split("-")
+    return ["-".join(subtags[:i]) for i in range(len(subtags), 0, -1)]
+
+class CollatorRegistry:
+    def __init__(self, rules_path=COLLATION_RULES_PATH, cache_dir=COLLATION_CACHE_DIR):
+        self.rules_path = rules_path
+        self.cache_dir = cache_dir
+        self._binary_rules = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
     def __repr__(self):
-        self.s = normalise(self.unf, self.s)
-        return "<trk s:%s, unf:%s>" % (self.s, self.unf)
+        return "<CollatorRegistry collators:%d>" % len(self._binary_rules)
+
+    # Tailoring rules for a language tag, or None
+    def tailoring(self, tag):
+        module = collation_rules_module(self.rules_path) if os.path.exists(self.rules_path) else None
+        for candidate in _tag_fallbacks(tag):
+            alias = language_tailorings.get(candidate)
+            for name in filter(None, [candidate, alias]):
+                rules = getattr(module, name.replace("-", "_") + "_rules", None)
+                if rules is not None:
+                    return rules
+            if alias in collation_tailorings:
+                return collation_tailorings[alias]
+        return None
+
+    def _cache_path(self, rules):
+        digest = hashlib.sha256((rules + "\0" + ICU_VERSION).encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.cache_dir, digest + ".bin")
+
+    # Compiled binary rules for a tailoring, from memory, disk or compiled
+    def binary_rules(self, rules):
+        binary = self._binary_rules.get(rules)
+        if binary is not None:
+            return binary
+        with self._lock:
+            binary = self._binary_rules.get(rules)
+            if binary is not None:
+                return binary
+            path = self._cache_path(rules)
+            try:
+                with open(path, "rb") as f:
+                    binary = f.read()
+            except OSError:
+                binary = RuleBasedCollator(rules).cloneBinary()
+                try:
+                    os.makedirs(self.cache_dir, exist_ok=True)
+                    tmp = "%s.%d.tmp" % (path, os.getpid())
+                    with open(tmp, "wb") as f:
+                        f.write(binary)
+                    os.replace(tmp, path)
+                except OSError:
+                    pass
+            self._binary_rules[rules] = binary
+        return binary
+
+    # Collator for a language tag, owned by the calling thread
+    def get(self, tag):
+        collators = getattr(self._local, "collators", None)
+        if collators is None:
+            collators = self._local.collators = {}
+        collator = collators.get(tag)
+        if collator is None:
+            rules = self.tailoring(tag)
+            if rules is None:
+                collator = Collator.createInstance(Locale.forLanguageTag(tag.replace("_", "-")))
+            else:
+                root = Collator.createInstance(Locale.getRoot())
+                collator = RuleBasedCollator(self.binary_rules(rules), root)
+            collators[tag] = collator
+        return collator
 
-    def __str__(self):
-        self.s = normalise(self.unf, self.s)
-        return str(self.s)
-    
-    def lower_(self):
-        self.s = normalise(self.unf, self.s)
-        if (self.unf == "NFC" or self.unf == "NFKC"):
-            self.s = self.s.replace('I', 'ı').replace('İ', 'i').lower()
-        else:
-            self.s = self.s.replace('I', 'ı').replace('I\u0307', 'i').lower()
-        return self.s
-    
-    def casefold_(self):
-        self.s = normalise(self.unf, self.s)
-        if (self.unf == "NFC" or self.unf == "NFKC"):
-            self.s = self.s.replace('I', 'ı').replace('İ', 'i').casefold()
-        else:
-            self.s = self.s.replace('I', 'ı').replace('I\u0307', 'i').lower()
-        return self.s
-    
-    def upper_(self):
-        self.s = normalise(self.unf, self.s)
-        if (self.unf == "NFC" or self.unf == "NFKC"):
-            self.s = self.s.replace('ı', 'I').replace('i', 'İ')
-        else:
-            self.s = self.s.replace('ı', 'I').replace('i', 'I\u0307')
-        return self.s.upper()
-    
-    def capitalize_(self):
-        self.s = normalise(self.unf, self.s)
-        first, rest = self.s[0], self.s[1:]
-        if (self.unf == "NFC" or self.unf == "NFKC"):
-            t = first.replace('ı', 'I').replace('i', 'İ').upper() + rest.replace('I', 'ı').replace('İ', 'i').lower()
-        else:
-            t = first.replace('ı', 'I').replace('i', 'I\u0307').upper() + rest.replace('I', 'ı').replace('I\u0307', 'i').lower()
-        return t
-    
-    def title_(self):
-        self.s = normalise(self.unf, self.s)
-        return " ".join(map(lambda x: trk(x).capitalize_(), self.s.split())) 
+COLLATOR_REGISTRY = CollatorRegistry()
 
-class ẞ:
-    def __init__(self, s, unf="NFD"):
+def collator_for(tag):
+    return COLLATOR_REGISTRY.get(tag)
+
+#################################################################
+#
+# Sort keys and bulk sorting
+#
+#     Binary sort keys are computed once for each distinct value, instead of
+#     once per comparison or per sort. Keys are bytes, so they can be stored
+#     alongside data (e.g. as a bytes column) and reused.
+#     key = function returning the string to collate for an item
+#
+#     Usage:
+#         collation_sort(words, "shn")
+#         collation_sort(records, "din", key=lambda r: r["title"])
+#         df["sort_key"] = sort_keys(df["title"], "ckb-IQ")
+#
+#         titles = CollatedList(titles, "ak")
+#         titles.merge(new_titles)
+#         titles.add("Ɔbaa")
+#
+#################################################################
+
+def sort_keys(items, tag, key=None):
+    collator = collator_for(tag)
+    values = list(items) if key is None else [key(item) for item in items]
+    keys = {value: collator.getSortKey(value) for value in set(values)}
+    return [keys[value] for value in values]
+
+def collation_sort(items, tag, key=None, reverse=False):
+    items = list(items)
+    keys = sort_keys(items, tag, key)
+    order = sorted(range(len(items)), key=keys.__getitem__, reverse=reverse)
+    return [items[i] for i in order]
+
+# Sorted list of items with their sort keys, supporting insertion and merging
+# of new items without re-sorting existing ones.
+class CollatedList:
+    def __init__(self, items=(), tag="", key=None):
+        self.tag = tag
+        self.key = key
+        self.items = []
+        self.keys = []
+        self.merge(items)
+
+    # Build from items already in collation order and their stored sort keys
+    @classmethod
+    def from_sorted(cls, items, keys, tag="", key=None):
+        collated = cls(tag=tag, key=key)
+        collated.items = list(items)
+        collated.keys = list(keys)
+        return collated
+
+    def __repr__(self):
+        return "<CollatedList tag:%s, items:%d>" % (self.tag, len(self.items))
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __getitem__(self, i):
+        return self.items[i]
+
+    def sort_key(self, item):
+        return collator_for(self.tag).getSortKey(item if self.key is None else self.key(item))
+
+    # Insert an item, after any items that collate equally, returning its position
+    def add(self, item):
+        k = self.sort_key(item)
+        i = bisect.bisect_right(self.keys, k)
+        self.items.insert(i, item)
+        self.keys.insert(i, k)
+        return i
+
+    # Merge new items: only the new items are sorted, then both lists are merged
+    # in a single linear pass
+    def merge(self, items):
+        items = list(items)
+        if not items:
+            return
+        new_keys = sort_keys(items, self.tag, self.key)
+        order = sorted(range(len(items)), key=new_keys.__getitem__)
+        merged = heapq.merge(
+            zip(self.keys, self.items),
+            ((new_keys[i], items[i]) for i in order),
+            key=operator.itemgetter(0)
+        )
+        self.keys, self.items = [], []
+        for k, item in merged:
+            self.keys.append(k)
+            self.items.append(item)
+
+#################################################################
+#
+# Casing engine
+#
+#     Reusable, language specific casing. An engine is constructed once per
+#     language tag, so tag standardisation and ICU Locale lookup are not
+#     repeated for each string, and each string is normalised only once.
+#
+#     Usage:
+#         tr = case_engine("tr")
+#         tr.upper("diyarbakır")
+#         list(tr.batch(["Iğdır", "İzmir"], "casefold"))
+#
+#################################################################
+
+SPECIAL_CASING_LANGUAGES = ["az", "az-Latn", "tr", "nl", "lt"]
+
+# Casefold, retaining ß and ẞ as ß rather than folding to ss
+def casefold_eszett(s):
+    return "ß".join(part.casefold() for part in s.replace("ẞ", "ß").split("ß"))
+
+class CaseEngine:
+    __slots__ = ("l", "loc", "language", "forceẞ", "unf", "special")
+
+    def __init__(self, l="", forceẞ=False, unf="NFD"):
+        self.l = l
+        self.forceẞ = bool(forceẞ)
         self.unf = unf.upper()
-        self.s = normalise(self.unf, self.s)
-    
-    def lower_(self):
-        self.s = normalise(self.unf, self.s)
-        return self.s.lower()
-    
-    def upper_(self):
-        self.s = normalise(self.unf, self.s)
-        self.s = self.s.replace('ß', 'ẞ')
-        return self.s.upper()
-    
-    def capitalize_(self):
-        self.s = normalise(self.unf, self.s)
-        return self.s.capitalize()
-    
-    def title_(self):
-        self.s = normalise(self.unf, self.s)
-        return self.s.title()
-    
-    def casefold_(self):
-        self.s = normalise(self.unf, self.s)
-        ds = ""
-        for i in range( len(self.s) ):
-            if not (self.s[i] == "ẞ" or self.s[i] == "ß"):
-                ds += self.s[i].casefold()
-            else:
-                ds += self.s[i].lower()
-        return ds
+        if l:
+            self.loc = Locale.forLanguageTag(standardize_tag(l, macro=True))
+        else:
+            self.loc = Locale.forLanguageTag("en-AU")
+        self.language = self.loc.getLanguage()
+        self.special = self.language in SPECIAL_CASING_LANGUAGES
+
+    def __repr__(self):
+        return "<CaseEngine l:%s, loc:%s, forceẞ:%s, unf:%s>" % (self.l, self.loc, self.forceẞ, self.unf)
+
+    def lower(self, s):
+        s = normalise(self.unf, s)
+        if self.special:
+            return str(UnicodeString(s).toLower(self.loc))
+        return s.lower()
+
+    def upper(self, s):
+        s = normalise(self.unf, s)
+        if self.forceẞ:
+            s = s.replace('ß', 'ẞ')
+        if self.special:
+            return str(UnicodeString(s).toUpper(self.loc))
+        return s.upper()
+
+    def capitalize(self, s):
+        s = normalise(self.unf, s)
+        if self.special:
+            if self.language == "nl" and s[0:2].lower() == "ij":
+                return str(UnicodeString(s[0:2]).toUpper(self.loc)) + str(UnicodeString(s[2:]).toLower(self.loc))
+            return str(UnicodeString(s[0:1]).toUpper(self.loc)) + str(UnicodeString(s[1:]).toLower(self.loc))
+        return s.capitalize()
+
+    def title(self, s):
+        s = normalise(self.unf, s)
+        if self.special:
+            if self.language == "tr" or self.language == "az":
+                # ICU drops U+0307 after a titlecased I, so title case İ precomposed
+                return normalise(self.unf, str(UnicodeString(s.replace('I\u0307', 'İ')).toTitle(self.loc)))
+            return str(UnicodeString(s).toTitle(self.loc))
+        return s.title()
+
+    def casefold(self, s):
+        s = normalise(self.unf, s)
+        if self.forceẞ:
+            s = casefold_eszett(s)
+        if self.special:
+            if self.language == "tr" or self.language == "az":
+                # Dotted capital I is I + U+0307 in decomposed forms
+                return s.replace('I\u0307', 'i').replace('İ', 'i').replace('I', 'ı').casefold()
+            return str(UnicodeString(s).foldCase())
+        if self.forceẞ:
+            return s
+        return s.casefold()
+
+    # Apply case operation (lower, upper, capitalize, title, casefold) to an
+    # iterable of strings, returning results lazily
+    def batch(self, texts, case="lower"):
+        return map(getattr(self, case), texts)
+
+# Cached engine for a language tag
+@functools.lru_cache(maxsize=None)
+def case_engine(l="", forceẞ=False, unf="NFD"):
+    return CaseEngine(l, forceẞ=bool(forceẞ), unf=unf)
 
 class uCase:
     def __init__(self, s="", l="", forceẞ=False, unf="NFD"):
-        # mode {'ẞ'}
-        self.specCasingLanguages = ["az", "az-Latn", "tr", "nl", "lt"]
         self.unf = unf.upper()
         self.forceẞ = forceẞ
-        defaultLang = "en-AU"
-        #self.defaultLoc = Locale.forLanguageTag(defaultLang)
-        if(l):
-            self.l = l
-            if (not l):
-                l = defaultLang
-            l = standardize_tag(l, macro=True)
-            # loc = Locale.forLanguageTag(l)
-            # if loc.getLanguage() in specCasingLanguages:
-            #     self.loc = loc
-            # else:
-            #     self.loc = ""
-            self.loc = Locale.forLanguageTag(l)
-        else:
-            self.l = ""
-            self.loc = Locale.forLanguageTag(defaultLang)
-        self.s = normalise(self.unf, self.s)
+        self.l = l
+        self.engine = case_engine(l, bool(forceẞ), self.unf)
+        self.loc = self.engine.loc
+        self.s = normalise(self.unf, s)
     
     def __repr__(self):
-        self.s = normalise(self.unf, self.s)
         return "<uCase s:%s, l:%s, loc:%s, forceẞ:%s, unf:%s>" % (self.s, self.l, self.loc, self.forceẞ, self.unf)
 
     def __str__(self):
-        self.s = normalise(self.unf, self.s)
         return str(self.s)
 
     def lower_(self):
-        self.s = normalise(self.unf, self.s)
-        if self.loc.getLanguage() in self.specCasingLanguages:
-            self.s = str(UnicodeString(self.s).toLower(self.loc))
-        else:
-            self.s = self.s.lower()
+        self.s = self.engine.lower(self.s)
         return self.s
     
     def upper_(self):
-        self.s = normalise(self.unf, self.s)
-        if (self.forceẞ):
-            self.s = self.s.replace('ß', 'ẞ')
-        if self.loc.getLanguage() in self.specCasingLanguages:
-            self.s = str(UnicodeString(self.s).toUpper(self.loc))
-        else:
-            self.s = self.s.upper()
+        self.s = self.engine.upper(self.s)
         return self.s
     
     def capitalize_(self):
-        self.s = normalise(self.unf, self.s)
-        if self.loc.getLanguage() in self.specCasingLanguages:
-            if (self.loc.getLanguage() == "nl" and self.s[0:2].lower() == "ij"):
-                self.s = str(UnicodeString(self.s[0:2]).toUpper(self.loc)) + str(UnicodeString(self.s[2:]).toLower(self.loc))
-            else:
-                self.s = str(UnicodeString(self.s[0]).toUpper(self.loc)) + str(UnicodeString(self.s[1:]).toLower(self.loc))
-        else:
-            self.s = self.s.capitalize()
+        self.s = self.engine.capitalize(self.s)
         return self.s
 
     def title_(self):
-        self.s = normalise(self.unf, self.s)
-        if self.loc.getLanguage() in self.specCasingLanguages:
-            self.s = str(UnicodeString(self.s).toTitle(self.loc))
-        else:
-             self.s = self.s.title()
+        self.s = self.engine.title(self.s)
         return self.s
 
     def casefold_(self):
-        self.s = normalise(self.unf, self.s)
-        if (self.forceẞ):
-            ds = ""
-            for i in range( len(self.s) ):
-                if not (self.s[i] == "ẞ" or self.s[i] == "ß"):
-                    ds += self.s[i].casefold()
-                else:
-                    ds += self.s[i].lower()
-            self.s = ds
-        if self.loc.getLanguage() in self.specCasingLanguages:
-            if (self.loc.getLanguage() == "tr" or self.loc.getLanguage() == "az"):
-                if (self.unf == "NFC" or self.unf == "NFKC"):
-                    self.s = self.s.replace('I', 'ı').replace('İ', 'i').casefold()
-                else:
-                    self.s = self.s.replace('I', 'ı').replace('I\u0307', 'i').casefold()
-            else:
-                self.s = str(UnicodeString(self.s).foldCase())
-        elif (not self.forceẞ):
-            self.s = self.s.casefold()
+        self.s = self.engine.casefold(self.s)
         return self.s
 
-class spCase:
-    def __init__(self, s, mode, unf="NFD"):
-        # mode {'ẞ', 'nl', 'lt'}
-        self.unf = unf.upper()
-        if(mode):
-            self.mode = mode
-        self.s = normalise(self.unf, self.s)
-    
+# Turkish casing
+class trk(uCase):
+    def __init__(self, s, unf="NFD"):
+        super().__init__(s, l="tr", unf=unf)
+
     def __repr__(self):
-        self.s = normalise(self.unf, self.s)
-        return "<spCase s:%s, mode:%s, unf:%s>" % (self.s, self.mode, self.unf)
+        return "<trk s:%s, unf:%s>" % (self.s, self.unf)
 
-    def __str__(self):
-        self.s = normalise(self.unf, self.s)
-        return str(self.s)
+# Casing that retains ß and uppercases it to ẞ
+class ẞ(uCase):
+    def __init__(self, s, unf="NFD", l=""):
+        super().__init__(s, l=l, forceẞ=True, unf=unf)
 
-    def lower_(self):
-        self.s = normalise(self.unf, self.s)
-        return self.s.lower()
-    
-    def upper_(self):
-        self.s = normalise(self.unf, self.s)
-        if (self.mode == "ẞ"):
-            self.s = self.s.replace('ß', 'ẞ')
-        return self.s.upper()
-    
-    def capitalize_(self):
-        self.s = normalise(self.unf, self.s)
-        if (self.mode == "nl" and self.s[0:2].lower() == "ij"):
-            self.s = self.s[0:2].upper() + self.s[2:].lower()
-            return self.s
-        return self.s.capitalize()
-    
-    # TODO:
-    # title_() borken for IJ/ij in Dutch
-    def title_(self):
-        self.s = normalise(self.unf, self.s)
-        if (self.mode == "nl"):
-            #return " ".join(map(lambda x: spCase(x, self.unf, self.mode).capitalize_(), self.s.split()))
-            l = self.s.split()
-            nl = []
-            for i in range(len(l)):
-                nl.append(spCase(l[i], self.unf, self.mode).capitalize_())
-            self.s = " ".join(nl)
-        else:
-            self.s = self.s.title()
-        return self.s
-    
-    def casefold_(self):
-        self.s = normalise(self.unf, self.s)
-        if (self.mode == "ẞ"):
-            ds = ""
-            for i in range( len(self.s) ):
-                if not (self.s[i] == "ẞ" or self.s[i] == "ß"):
-                    ds += self.s[i].casefold()
-                else:
-                    ds += self.s[i].lower()
-            self.s = ds
-            return self.s
+    def __repr__(self):
+        return "<ẞ s:%s, l:%s, unf:%s>" % (self.s, self.l, self.unf)
+
+# Special casing, mode {'ẞ', 'nl', 'lt'}
+class spCase(uCase):
+    def __init__(self, s, mode, unf="NFD"):
+        self.mode = mode
+        if mode == "ẞ":
+            super().__init__(s, forceẞ=True, unf=unf)
         else:
-            return self.s.casefold()
+            super().__init__(s, l=mode, unf=unf)
+
+    def __repr__(self):
+        return "<spCase s:%s, mode:%s, unf:%s>" % (self.s, self.mode, self.unf)
 
 class uu:
     def __init__(self, s="", l="", isTrk=False, unf="NFD", forceẞ=False, mode="script"):
@@ -399,16 +521,13 @@ class uu:
         #else:
         #    self.s = NFKD(s)
     def __repr__(self):
-        self.s = normalise(self.unf, self.s)
         return "<uu s:%s, l:%s, isTrk:%s, unf:%s, forceẞ:%s>" % (self.s, self.l, self.trk, self.unf, self.forceẞ)
 
     def __str__(self):
-        self.s = normalise(self.unf, self.s)
         return str(self.s)
 
     def canonical_caseless(self):
         ICU = __ICUavailable__
-        self.s = normalise(self.unf, self.s)
         if (self.trk):
             ICU = False
         if (ICU):
@@ -416,22 +535,18 @@ class uu:
                 # canonical caseless
                 # A string X is a canonical caseless match for a string Y if and only if:
                 # NFD(toCasefold(NFD( X ))) = NFD(toCasefold(NFD( Y )))
-                t = uCase(self.s, l=self.l, forceẞ=self.forceẞ, unf=self.unf)
-                self.s = NFD(t.casefold_())
+                self.s = NFD(case_engine(self.l, bool(self.forceẞ), "NFD").casefold(self.s))
             elif (self.unf == "NFKC"):
                 # identifier caseless
                 # A string X is an identifier caseless match for a string Y if and only if:
                 # toNFKC_Casefold(NFD( X)) = toNFKC_Casefold(NFD( Y ))
-                t = uCase(s=self.s, l=self.l, forceẞ=self.forceẞ, unf=self.unf)
-                self.s = t.casefold_()
+                self.s = case_engine(self.l, bool(self.forceẞ), "NFKC").casefold(self.s)
             else:
                 # compatibility caseless
                 # A string X is a compatibility caseless match for a string Y if and only if:
                 # NFKD(toCasefold(NFKD(toCasefold(NFD( X ))))) =NFKD(toCasefold(NFKD( ~~toCasefold(NFD( Y ))~~ )))
-                t1 = uCase(self.s, l=self.l, forceẞ=self.forceẞ, unf="NFD")
-                s = t1.casefold_()
-                t2 = uCase(s, l=self.l, forceẞ=self.forceẞ, unf="NFKD")
-                self.s = NFKD(t2)
+                s = case_engine(self.l, bool(self.forceẞ), "NFD").casefold(self.s)
+                self.s = NFKD(case_engine(self.l, bool(self.forceẞ), "NFKD").casefold(s))
         else:
             if (self.trk and self.unf == "NFD"):
                 #self.s = NFD(NFD(trk(self.s, self.unf).casefold_()))
@@ -454,10 +569,11 @@ class uu:
                 self.s = NFKC(self.s).casefold()
             else:
                 self.s = NFKD(NFKD(NFD(self.s).casefold()).casefold())
+        # Keep the string in the instance's normalisation form
+        self.s = normalise(self.unf, self.s)
         return self.s
 
     def codepoints(self):
-        self.s = normalise(self.unf, self.s)
         if (self.mode == "console"):
             print(' '.join('U+{:04X}'.format(ord(c)) for c in self.s))
             return
@@ -465,7 +581,6 @@ class uu:
             return ' '.join('U+{:04X}'.format(ord(c)) for c in self.s)
     
     def udata(self):
-        self.s = normalise(self.unf, self.s)
         if (self.mode == "console"):
             print("  | cp | name | script | block | cat | bidi")
             for c in splitString(self.s):
@@ -480,11 +595,10 @@ class uu:
             return message
     
     def lengthData(self):
-        self.s = normalise(self.unf, self.s)
         print("String: " + self.s)
         print("Codepoints: " +  uu(self.s, unf=self.unf).codepoints())
         #print("\n")
-        data = [['Characters', len(self.s)], ['Bytes', utf8len(self.s)], ['Graphemes', grapheme.length(self.s)]]
+        data = [['Characters', len(self.s)], ['Bytes', utf8len(self.s)], ['Graphemes', grapheme_engine().length(self.s)]]
         datahead = ['Component', 'Count']
         print(tabulate(data, headers=datahead, tablefmt='grid'))
 
@@ -493,31 +607,104 @@ class uu:
 #     # Need to rewrite to be language sensitive
 #     return x.casefold() == y.casefold()
 
+#
+# Caseless match keys
+#     Keys are computed once per string, language and forceẞ setting, and
+#     hot strings are kept in an LRU cache.
+#
+
+CASELESS_KEY_CACHE_SIZE = 65536
+
+@functools.lru_cache(maxsize=CASELESS_KEY_CACHE_SIZE)
+def canonical_caseless_key(x, lang="", forceẞ=False):
+    # NFD(toCasefold(NFD( X )))
+    return NFD(case_engine(lang, bool(forceẞ), "NFD").casefold(x))
+
+@functools.lru_cache(maxsize=CASELESS_KEY_CACHE_SIZE)
+def compatibility_caseless_key(x, lang="", forceẞ=False):
+    # NFKD(toCasefold(NFKD(toCasefold(NFD( X )))))
+    s = case_engine(lang, bool(forceẞ), "NFD").casefold(x)
+    return NFKD(case_engine(lang, bool(forceẞ), "NFKD").casefold(s))
+
+@functools.lru_cache(maxsize=CASELESS_KEY_CACHE_SIZE)
+def identifier_caseless_key(x, lang="", forceẞ=False):
+    # toNFKC_Casefold(NFD( X ))
+    return case_engine(lang, bool(forceẞ), "NFKC").casefold(x)
+
+CASELESS_KEYS = {
+    "canonical": canonical_caseless_key,
+    "compatibility": compatibility_caseless_key,
+    "identifier": identifier_caseless_key
+}
+
 def is_canonical_caseless_match(x, y, lang="", nf="", forceẞ=""):
     # NFD(toCasefold(NFD( X ))) = NFD(toCasefold(NFD( Y ))
-    tx = uCase(s=x, l=lang, unf="NFD", forceẞ=forceẞ)
-    ty = uCase(s=y, l=lang, unf="NFD", forceẞ=forceẞ)
-    return NFD(tx.casefold_()) == NFD(ty.casefold_())
+    return canonical_caseless_key(x, lang, bool(forceẞ)) == canonical_caseless_key(y, lang, bool(forceẞ))
 
 def is_compatibility_caseless_match(x,y, lang="", forceẞ=""):
     # NFKD(toCasefold(NFKD(toCasefold(NFD( X ))))) = NFKD(toCasefold(NFKD(toCasefold(NFD( Y )))))
-    tx = uCase(s=x, l=lang, unf="NFD", forceẞ=forceẞ)
-    sx = tx.casefold_()
-    tx.unf = "NFKD"
-    tx.s = sx
-    sx = tx.casefold_()
-    ty = uCase(s=y, l=lang, unf="NFD", forceẞ=forceẞ)
-    sy = ty.casefold_()
-    ty.unf = "NFKD"
-    ty.s = sy
-    sy = ty.casefold_()
-    return NFKD(sx) == NFKD(sy)
+    return compatibility_caseless_key(x, lang, bool(forceẞ)) == compatibility_caseless_key(y, lang, bool(forceẞ))
 
 def is_identifier_caseless_match(x,y, lang="", nf="", forceẞ=""):
     # toNFKC_Casefold(NFD( X)) = toNFKC_Casefold(NFD( Y ))
-    tx = uCase(s=x, l=lang, unf="NFKC", forceẞ=forceẞ)
-    ty = uCase(s=y, l=lang, unf="NFKC", forceẞ=forceẞ)
-    return tx.casefold_() == ty.casefold_()
+    return identifier_caseless_key(x, lang, bool(forceẞ)) == identifier_caseless_key(y, lang, bool(forceẞ))
+
+#
+# CaselessIndex
+#     Hashed index of records by caseless match key, for deduplication and
+#     lookup without pairwise comparisons.
+#     match = canonical | compatibility | identifier
+#
+#     Usage:
+#         index = CaselessIndex(["Straße", "STRASSE", "ﬁle"], match="compatibility")
+#         index.lookup("strasse")         # [0, 1]
+#         dict(index.duplicates())        # {'strasse': [0, 1]}
+#
+
+class CaselessIndex:
+    def __init__(self, records=None, match="canonical", lang="", forceẞ=False):
+        self.match = match.lower()
+        self.lang = lang
+        self.forceẞ = bool(forceẞ)
+        self._key = CASELESS_KEYS[self.match]
+        self.index = {}
+        if records is not None:
+            self.update(records)
+
+    def __repr__(self):
+        return "<CaselessIndex match:%s, lang:%s, keys:%d>" % (self.match, self.lang, len(self.index))
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, x):
+        return self.key(x) in self.index
+
+    def key(self, x):
+        return self._key(x, self.lang, self.forceẞ)
+
+    # Add a record, identified by record_id, returning its key
+    def add(self, record, record_id):
+        k = self.key(record)
+        self.index.setdefault(k, []).append(record_id)
+        return k
+
+    # Add records from a mapping of ids to records, or from a sequence using
+    # positions as ids
+    def update(self, records):
+        items = records.items() if hasattr(records, "items") else enumerate(records)
+        for record_id, record in items:
+            self.add(record, record_id)
+
+    # Ids of records that caselessly match x
+    def lookup(self, x):
+        return list(self.index.get(self.key(x), []))
+
+    # Groups of record ids that share a key
+    def duplicates(self):
+        for k, ids in self.index.items():
+            if len(ids) > 1:
+                yield k, ids
 
 # https://stackoverflow.com/questions/3411771/best-way-to-replace-multiple-characters-in-a-string
 